@@ -1,8 +1,26 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
 from pyswip import Prolog
 from pathlib import Path
 from datetime import datetime
 
+APP_ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(APP_ROOT / "src"))
+
+from interaction_provenance import ProvenanceStore
+from kb_store import KBStore
+from check_cache import CheckCache
+from cache_warmup import warm_from_logs
+from check_profiler import CheckProfile, profiling_enabled
+from prolog_queries import (
+    STATUS_ERROR, QueryResult, budget_stats, prepare_app_queries, set_default_budget,
+)
+
 # -------------------------------
 # PROLOG SETUP
 # -------------------------------
@@ -26,22 +44,88 @@ def load_prolog():
 
 prolog = load_prolog()
 
-def run_query(query_str: str):
+# Per-query budgets (0 = unlimited). A query that runs out returns what
+# it found so far, marked incomplete, instead of stalling the engine.
+QUERY_TIME_LIMIT_S = float(os.environ.get("MEDSAFE_QUERY_TIME_LIMIT_S", "2"))
+QUERY_INFERENCE_LIMIT = int(os.environ.get("MEDSAFE_QUERY_INFERENCE_LIMIT", "5000000"))
+set_default_budget(QUERY_TIME_LIMIT_S, QUERY_INFERENCE_LIMIT)
+
+@st.cache_resource
+def load_queries():
+    """
+    Goals used by the app, compiled once per process (see
+    src/prolog_queries.py); calls bind IDs directly instead of
+    formatting query text.
+    """
+    return prepare_app_queries(prolog)
+
+queries = load_queries()
+
+def run_prepared(name: str, *args, maxresult: int = -1):
     """
-    Safe wrapper for Prolog queries.
-    Returns a list of dict results, or an empty list.
+    Safe wrapper for prepared Prolog queries: warns on failure.
+    Returns a QueryResult; check `.complete` for budget cut-offs. A query
+    that raised (e.g. pyswip's NestedQueryError when sessions overlap)
+    comes back empty with status 'error', so it is neither cached nor
+    shown as an all-clear.
     """
     try:
-        return list(prolog.query(query_str))
+        return queries[name].run(*args, maxresult=maxresult)
     except Exception as e:
-        # Helps debug malformed queries
-        st.warning(f"Prolog query failed: {query_str}\nError: {e}")
-        return []
+        st.warning(f"Prolog query failed: {queries[name].goal} {args}\nError: {e}")
+        budget_stats.record(name, STATUS_ERROR)
+        return QueryResult(status=STATUS_ERROR)
+
+# -------------------------------
+# INTERACTION PROVENANCE
+# -------------------------------
+PROVENANCE_FILE = APP_ROOT / "kb" / "interactions.prov"
+
+@st.cache_resource
+def load_provenance():
+    """
+    Original DrugBank sentences behind interaction/3 facts, written by
+    src/xml_to_interactions_pl.py. Optional: returns None if not built.
+    """
+    if not PROVENANCE_FILE.exists():
+        return None
+    return ProvenanceStore(PROVENANCE_FILE)
+
+provenance = load_provenance()
+
+# -------------------------------
+# DRUG RISK PROFILES
+# -------------------------------
+PROFILE_DB = APP_ROOT / "kb" / "medsafe.db"
+
+@st.cache_resource
+def load_profiles():
+    """
+    Per-drug risk profiles precomputed by src/kb_store.py (drug_profiles
+    table), held in memory for O(1) lookups. Optional: returns {} if the
+    store has not been built, or was built from different fact files
+    than the ones consulted above, and checks fall back to live queries.
+    Returns (profiles, stale predicates).
+    """
+    if not PROFILE_DB.exists():
+        return {}, []
+    try:
+        store = KBStore(PROFILE_DB)
+        try:
+            stale = store.stale_sources()
+            if stale:
+                return {}, stale
+            return store.profiles(), []
+        finally:
+            store.close()
+    except sqlite3.Error:
+        return {}, []
+
+PROFILES, STALE_PROFILE_SOURCES = load_profiles()
 
 # -------------------------------
 # PATHS & LOGGING
 # -------------------------------
-APP_ROOT = Path(__file__).resolve().parent
 LOG_DIR = APP_ROOT / "logs"
 LOG_DIR.mkdir(exist_ok=True)
 SESSION_LOG = LOG_DIR / "sessions.csv"
@@ -63,6 +147,24 @@ def log_session(query_drug_id, query_drug_label, conditions, current_meds_labels
         f.write(line)
 
 
+@st.cache_resource
+def load_log_writer():
+    """One background writer per process; a single worker keeps lines whole."""
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="medsafe-log")
+
+session_log_writer = load_log_writer()
+
+
+def _report_log_error(future):
+    if future.exception() is not None:
+        print(f"⚠️ Session log write failed: {future.exception()}", file=sys.stderr)
+
+
+def log_session_async(**kwargs):
+    """log_session() off the request path: results never wait on the disk."""
+    session_log_writer.submit(log_session, **kwargs).add_done_callback(_report_log_error)
+
+
 # -------------------------------
 # DRUG INDEX (for autocomplete)
 # -------------------------------
@@ -74,7 +176,7 @@ def build_drug_index():
       - mapping label -> atom_name
     """
     index = []
-    for sol in prolog.query("drug(ID, Name)"):
+    for sol in queries["drugs"]():
         drug_id = sol["ID"]
         atom = sol["Name"]            # e.g. acetylsalicylic_acid
         label_name = atom.replace("_", " ").title()
@@ -123,6 +225,271 @@ def confidence_badge(severity: str) -> str:
     return "⬜ **UNKNOWN CONFIDENCE**"
 
 
+RISK_BADGES = {
+    "🔴": "high risk",
+    "🟠": "has major interactions",
+    "🟢": "no known risks",
+    "🟡": "other",
+}
+
+def risk_badge(drug_id: str) -> str:
+    """Drug picker badge from the precomputed profile (no queries)."""
+    profile = PROFILES.get(drug_id)
+    if profile is None:
+        return ""
+    if profile["high_risk"]:
+        return "🔴"
+    if profile["interactions"]["major"]:
+        return "🟠"
+    if profile["safe"]:
+        return "🟢"
+    return "🟡"
+
+
+def picker_label(label: str) -> str:
+    badge = risk_badge(LABEL_TO_ID.get(label))
+    return f"{badge} {label}" if badge else label
+
+
+# Legend for the badges the picker actually shows: with the bundled KB
+# every drug has a drug_class/2 entry, so safe_drug/1 (and 🟢) never holds.
+PICKER_BADGES = {risk_badge(LABEL_TO_ID[label]) for label in DRUG_LABELS}
+BADGE_LEGEND = " · ".join(
+    f"{badge} {meaning}" for badge, meaning in RISK_BADGES.items()
+    if badge in PICKER_BADGES
+)
+
+
+# -------------------------------
+# SAFETY CHECKS (cached)
+# -------------------------------
+CHECK_CACHE_SIZE = int(os.environ.get("MEDSAFE_CHECK_CACHE_SIZE", "4096"))
+WARMUP_TOP_N = int(os.environ.get("MEDSAFE_WARMUP_TOP_N", "50"))
+WARMUP_BUDGET_S = float(os.environ.get("MEDSAFE_WARMUP_BUDGET_S", "5"))
+WARMUP_WINDOW_DAYS = int(os.environ.get("MEDSAFE_WARMUP_WINDOW_DAYS", "30"))
+
+@st.cache_resource
+def load_check_cache():
+    """One result cache per server process, shared by all sessions."""
+    return CheckCache(maxsize=CHECK_CACHE_SIZE)
+
+check_cache = load_check_cache()
+
+
+def query_condition_risks(drug_id, conditions):
+    """Conditions (from the given list) the drug is contraindicated for."""
+    risky = QueryResult()
+    for c in conditions:
+        res = run_prepared("unsafe_for_condition", drug_id, c, maxresult=1)
+        if res:
+            risky.append(c)
+        elif not res.complete:
+            risky.status = res.status
+    return risky
+
+
+def profile_condition_risks(profile, conditions):
+    """query_condition_risks() answered from a precomputed profile."""
+    return QueryResult(c for c in conditions if c in profile["conditions"])
+
+
+def profile_food_risks(profile):
+    """query_food_risks() answered from a precomputed profile."""
+    first = {}
+    for food_atom, effect in profile["foods"]:
+        first.setdefault(food_atom, effect)
+    return QueryResult(first.items())
+
+
+def query_drug_pair(drug_id, other_id):
+    """
+    [(severity, reason), ...] for one query drug / current med pair.
+    """
+    # --- Severity Query ---
+    severities = run_prepared("pair_severity", drug_id, other_id)
+    results = QueryResult(status=severities.status)
+    for r in severities:
+        severity = r.get("Severity", "moderate")
+
+        # --- Explanation query ---
+        reason_res = run_prepared("pair_reason", drug_id, other_id, maxresult=1)
+        reason = reason_res[0]["Reason"] if reason_res else "interaction"
+        if not reason_res.complete and results.complete:
+            results.status = reason_res.status   # fallback reason is not an answer
+
+        results.append((severity, reason))
+    return results
+
+
+def query_food_risks(drug_id):
+    """[(food_atom, reason), ...] for the drug."""
+    foods = run_prepared("foods", drug_id)
+    results = QueryResult(status=foods.status)
+    for r in foods:
+        food_atom = r["Food"]              # e.g. grapefruit
+
+        reason_res = run_prepared("food_reason", drug_id, food_atom, maxresult=1)
+        reason = reason_res[0]["Reason"] if reason_res else "interaction"
+        if not reason_res.complete and results.complete:
+            results.status = reason_res.status   # fallback reason is not an answer
+
+        results.append((food_atom, reason))
+    return results
+
+
+def is_complete(value) -> bool:
+    """Only results no query budget cut short are worth caching."""
+    if isinstance(value, dict):
+        return not value["incomplete"]
+    return value.complete
+
+
+def cached_drug_pair(drug_id, other_id):
+    # The cache lives as long as the process: a pair whose lookup failed
+    # or was cut short must be retried, not remembered as "no interaction".
+    return check_cache.get_or_compute(
+        CheckCache.pair_key(drug_id, other_id),
+        lambda: query_drug_pair(drug_id, other_id),
+        cacheable=is_complete,
+    )
+
+
+def iter_check(drug_id, med_ids, conditions, use_cache: bool = True):
+    """
+    The check one part at a time, in display order, so the UI can show
+    each part as soon as it resolves:
+      ("conditions", [cond, ...]),
+      (other_id, [(severity, reason), ...]) per current med,
+      ("foods", [(food_atom, reason), ...])
+    With use_cache=False every pair is queried, never read from the cache.
+    """
+    pair = cached_drug_pair if use_cache else query_drug_pair
+    profile = PROFILES.get(drug_id)
+    yield "conditions", (profile_condition_risks(profile, conditions) if profile
+                         else query_condition_risks(drug_id, conditions))
+    for other_id in med_ids:
+        if other_id:
+            yield other_id, pair(drug_id, other_id)
+    yield "foods", (profile_food_risks(profile) if profile
+                    else query_food_risks(drug_id))
+
+
+def assemble_check(parts) -> dict:
+    """Fold iter_check() parts into the compute_check() result."""
+    result = {"conditions": QueryResult(), "drugs": {}, "foods": QueryResult(),
+              "incomplete": {}}
+    for part, rows in parts:
+        if part in ("conditions", "foods"):
+            result[part] = rows
+        else:
+            result["drugs"][part] = rows
+        if not rows.complete:
+            result["incomplete"][part] = rows.status
+    return result
+
+
+def check_parts(result, med_ids):
+    """
+    A compute_check() result back as iter_check() parts, drugs in the
+    order of `med_ids` (the cache key is order-insensitive, so a cached
+    result may have been computed for the same meds listed differently).
+    """
+    yield "conditions", result["conditions"]
+    for other_id in med_ids:
+        if other_id in result["drugs"]:
+            yield other_id, result["drugs"][other_id]
+    yield "foods", result["foods"]
+
+
+def compute_check(drug_id, med_ids, conditions):
+    """
+    Full check for one profile, as plain data:
+      {"conditions": [cond, ...],
+       "drugs": {other_id: [(severity, reason), ...]},
+       "foods": [(food_atom, reason), ...],
+       "incomplete": {"conditions" | other_id | "foods": status}}
+    "incomplete" lists the parts a query budget cut short.
+    """
+    return assemble_check(iter_check(drug_id, med_ids, conditions))
+
+
+@st.cache_resource
+def start_cache_warmup():
+    """
+    Pre-compute the most frequent recent checks from logs/sessions.csv
+    once per server process, within MEDSAFE_WARMUP_BUDGET_S seconds.
+    Runs in a background thread so the first page load is not held up;
+    checks that miss in the meantime fall back to live queries. Returns
+    the report dict, filled in (and "done" set) when the warm-up ends.
+    """
+    report = {"done": False}
+
+    def run():
+        try:
+            report.update(warm_from_logs(
+                check_cache,
+                compute_check=compute_check,
+                compute_pair=query_drug_pair,
+                log_path=SESSION_LOG,
+                top_n=WARMUP_TOP_N,
+                budget_s=WARMUP_BUDGET_S,
+                window_days=WARMUP_WINDOW_DAYS,
+                cacheable=is_complete,
+            ))
+        except Exception as e:
+            print(f"Cache warm-up failed: {e}", file=sys.stderr)
+        finally:
+            report["done"] = True
+
+    threading.Thread(target=run, name="medsafe-warmup", daemon=True).start()
+    return report
+
+WARMUP_REPORT = start_cache_warmup()
+
+
+# -------------------------------
+# RESULT RENDERING
+# -------------------------------
+def part_warnings(query_drug_id, part, rows, conditions, id_to_label):
+    """Markdown warning lines for one iter_check() part."""
+    if part == "conditions":
+        return [
+            f"• **Condition risk** — Not safe with *{c.replace('_',' ')}*."
+            for c in conditions if c in rows
+        ]
+
+    if part == "foods":
+        return [
+            f"• **Food avoidance** — Avoid *{food_atom.replace('_', ' ')}* "
+            f"(Reason: {reason.replace('_', ' ')})."
+            for food_atom, reason in rows
+        ]
+
+    # Drug–drug interactions with severity + explanation
+    warnings = []
+    for severity, reason in rows:
+        conf = confidence_badge(severity)
+
+        # --- Source sentence (fetched on demand from the provenance store) ---
+        source = provenance.lookup(query_drug_id, part) if provenance else None
+        source_md = f"\n\n  > *DrugBank:* {source}" if source else ""
+
+        warnings.append(
+            f"• **Drug interaction** with *{id_to_label.get(part, part)}* — "
+            f"Severity: **{severity.upper()}** ({reason.replace('_',' ')}) "
+            f"{conf}{source_md}"
+        )
+    return warnings
+
+
+def part_label(part, id_to_label) -> str:
+    if part == "conditions":
+        return "conditions"
+    if part == "foods":
+        return "food"
+    return id_to_label.get(part, part)
+
+
 # -------------------------------
 # UI SETUP
 # -------------------------------
@@ -133,6 +500,12 @@ st.caption(
     "Rule-based medication safety using a Prolog knowledge base "
     "built from DrugBank XML and FDA label–aligned rules."
 )
+if STALE_PROFILE_SOURCES:
+    st.warning(
+        f"`{PROFILE_DB.relative_to(APP_ROOT)}` is out of date "
+        f"({', '.join(STALE_PROFILE_SOURCES)} changed since it was built); "
+        "using live Prolog queries. Rebuild it with `python src/kb_store.py`."
+    )
 
 st.divider()
 
@@ -158,18 +531,22 @@ st.subheader("💊 Current Medications")
 current_meds_labels = st.multiselect(
     "Start typing to search and select your ongoing medications:",
     DRUG_LABELS,
+    format_func=picker_label,
 )
 
 st.caption(
     "These medicines are shown based on the DrugBank-derived knowledge base. "
     "Selections represent what you are currently taking."
 )
+if BADGE_LEGEND:
+    st.caption(BADGE_LEGEND)
 
 st.divider()
 
 query_drug_label = st.selectbox(
     "❓ Which medicine do you want to check?",
     DRUG_LABELS,
+    format_func=picker_label,
     index=DRUG_LABELS.index(next((l for l in DRUG_LABELS if "Ibuprofen" in l), DRUG_LABELS[0]))
     if DRUG_LABELS else 0
 )
@@ -185,92 +562,92 @@ if st.button("🔍 Check Safety"):
 
     query_drug_id = LABEL_TO_ID[query_drug_label]
 
-    # Clear user facts in Prolog
-    prolog.retractall("user_condition(_)")
-    prolog.retractall("user_takes(_)")
-
-    # Assert user profile (conditions)
-    for c in conditions:
-        prolog.assertz(f"user_condition({c})")
-
-    # Assert current medications (by DrugBank ID)
-    for label in current_meds_labels:
-        med_id = LABEL_TO_ID.get(label)
-        if med_id:
-            prolog.assertz(f"user_takes('{med_id}')")
-
     st.subheader("⚠️ Safety Analysis")
 
-    warnings = []
-
-    # ---------------------------
-    # Condition-based risks
-    # ---------------------------
-    for c in conditions:
-        q = f"unsafe_for_condition('{query_drug_id}', {c})"
-        if list(prolog.query(q)):
-            warnings.append(
-                f"• **Condition risk** — Not safe with *{c.replace('_',' ')}*."
-            )
-
-    # ---------------------------
-# Drug–drug interactions with severity + explanation
-# ---------------------------
-    for label in current_meds_labels:
-        other_id = LABEL_TO_ID.get(label)
-        if not other_id:
-            continue
-
-    # --- Severity Query ---
-        q = f"unsafe_context('{query_drug_id}', drug('{other_id}'), Severity)"
-        interaction_results = run_query(q)
+    # Opt-in profiling (MEDSAFE_PROFILE=1 or ?profile=1). A profiled
+    # request skips the check and pair caches so the cold path is what
+    # gets measured; the profilers are stopped even if a query raises.
+    profile = None
+    profile_dir = None
+    if profiling_enabled(st.query_params.get("profile") == "1"):
+        profile = CheckProfile(f"check_{query_drug_id}", prolog).start()
 
-        for r in interaction_results:
-            severity = r.get("Severity", "moderate")
-            conf = confidence_badge(severity)
-
-        # --- Explanation query ---
-            expl_q = f"explain_unsafe('{query_drug_id}', drug('{other_id}'), Reason)"
-            reason_res = run_query(expl_q)
-            reason = reason_res[0]["Reason"] if reason_res else "interaction"
-
-            warnings.append(
-            f"• **Drug interaction** with *{label}* — "
-            f"Severity: **{severity.upper()}** ({reason.replace('_',' ')}) "
-            f"{conf}"
-        )
+    try:
+        med_ids = [m for m in (LABEL_TO_ID.get(label) for label in current_meds_labels) if m]
+        id_to_label = {LABEL_TO_ID.get(label): label for label in current_meds_labels}
+
+        # A cached check renders at once; otherwise each part is shown as
+        # soon as its queries finish (conditions, then each pair, then food).
+        check_key = CheckCache.check_key(query_drug_id, med_ids, conditions)
+        cached = check_cache.get(check_key) if profile is None else None
+        parts = (check_parts(cached, med_ids) if cached is not None
+                 else iter_check(query_drug_id, med_ids, conditions,
+                                 use_cache=profile is None))
+
+        order = ["conditions", *med_ids, "foods"]
+        banner = st.empty()
+        progress = st.progress(0.0, text=f"Checking {part_label(order[0], id_to_label)}…")
+
+        warnings = []
+        done = []
+        timings = []
+        first_warning_s = None
+        t_start = t_part = time.perf_counter()
+        for k, (part, rows) in enumerate(parts, 1):
+            timings.append((part_label(part, id_to_label), time.perf_counter() - t_part))
+            done.append((part, rows))
+
+            new_warnings = part_warnings(query_drug_id, part, rows, conditions, id_to_label)
+            if new_warnings and not warnings:
+                banner.error("Potential safety concerns detected:")
+                first_warning_s = time.perf_counter() - t_start
+            for w in new_warnings:
+                st.markdown(w)
+            warnings.extend(new_warnings)
+
+            if k < len(order):
+                progress.progress(k / len(order),
+                                  text=f"Checking {part_label(order[k], id_to_label)}…")
+            t_part = time.perf_counter()
+        total_s = time.perf_counter() - t_start
+        progress.empty()
+    finally:
+        if profile is not None:
+            profile_dir = profile.finish()
+
+    result = assemble_check(done)
+    if cached is None and profile is None and is_complete(result):
+        check_cache.put(check_key, result)
+
+    if not warnings and not result["incomplete"]:
+        banner.success("✅ No major safety risks detected based on your profile.")
 
     # ---------------------------
-    # Food interactions + reasons
+    # Partial results (query budget exceeded or query failed)
     # ---------------------------
-    food_q = f"unsafe_with_food('{query_drug_id}', Food)"
-    food_results = list(prolog.query(food_q))
-
-    for r in food_results:
-        food_atom = r["Food"]              # e.g. grapefruit
-        food_name = str(food_atom).replace("_", " ")
-
-        expl_q = f"explain_unsafe('{query_drug_id}', food({food_atom}), Reason)"
-        reason_res = list(prolog.query(expl_q))
-        reason = reason_res[0]["Reason"] if reason_res else "interaction"
-
-        warnings.append(
-            f"• **Food avoidance** — Avoid *{food_name}* "
-            f"(Reason: {reason.replace('_', ' ')})."
+    if result["incomplete"]:
+        cut_parts = [
+            f"{id_to_label.get(part, part)} ({status.replace('_', ' ')})"
+            for part, status in result["incomplete"].items()
+        ]
+        st.warning(
+            "⏱️ **Partial result** — some checks failed or hit their query budget "
+            "and were stopped early, so risks may be missing for: " + ", ".join(cut_parts)
         )
 
     # ---------------------------
-    # Display Results
+    # Per-part timing
     # ---------------------------
-    if warnings:
-        st.error("Potential safety concerns detected:")
-        for w in warnings:
-            st.markdown(w)
-    else:
-        st.success("✅ No major safety risks detected based on your profile.")
+    timing_md = " · ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in timings)
+    first_md = (f" · first warning after {first_warning_s * 1000:.0f} ms"
+                if first_warning_s is not None else "")
+    st.caption(
+        f"⏱️ {timing_md} · total {total_s * 1000:.0f} ms{first_md}"
+        + (" (from check cache)" if cached is not None else "")
+    )
 
-    # Log this session
-    log_session(
+    # Log this session (written in the background)
+    log_session_async(
         query_drug_id=query_drug_id,
         query_drug_label=query_drug_label,
         conditions=conditions,
@@ -278,11 +655,39 @@ if st.button("🔍 Check Safety"):
         warnings=warnings,
     )
 
+    if profile_dir is not None:
+        st.caption(f"🔬 Profile written to `{profile_dir.relative_to(APP_ROOT)}`")
+
     st.caption(
         "This tool provides educational safety warnings only and does not "
         "replace professional medical advice. Always consult a healthcare professional."
     )
 
+    cache_stats = check_cache.stats()
+    if not WARMUP_REPORT["done"]:
+        warmup_note = "in progress"
+    elif "seconds" not in WARMUP_REPORT:
+        warmup_note = "failed"
+    else:
+        warmup_note = (
+            f"{WARMUP_REPORT['combos_warmed']} checks + {WARMUP_REPORT['pairs_warmed']} pairs "
+            f"from {WARMUP_REPORT['sessions_analysed']} logged sessions in "
+            f"{WARMUP_REPORT['seconds']:.1f}s "
+            f"(projected hit rate {WARMUP_REPORT['check_hit_rate']:.0%} checks, "
+            f"{WARMUP_REPORT['pair_hit_rate']:.0%} pairs)"
+        )
+    st.caption(
+        f"Check cache: {cache_stats['size']} entries, "
+        f"hit rate {cache_stats['hit_rate']:.0%} this process · warm-up: {warmup_note}"
+    )
+
+    budget = budget_stats.stats()
+    st.caption(
+        f"Query budgets ({QUERY_TIME_LIMIT_S:g}s / {QUERY_INFERENCE_LIMIT:,} inferences): "
+        f"{budget['time_limit']} time-outs, {budget['inference_limit']} inference "
+        f"cut-offs, {budget['errors']} errors in {budget['queries']} queries this process"
+    )
+
     st.divider()
 
     # ---------------------------
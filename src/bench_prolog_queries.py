@@ -0,0 +1,131 @@
+import argparse
+import random
+import time
+from pathlib import Path
+
+from pyswip import Prolog
+
+import prolog_queries
+from prolog_queries import prepare_app_queries
+
+# ----------------------------
+# PATH SETUP
+# ----------------------------
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+# Same files, same order as app.py
+KB_FILES = [
+    PROJECT_ROOT / 'kb' / 'drugs.pl',
+    PROJECT_ROOT / 'kb' / 'drug_interactions.pl',
+    PROJECT_ROOT / 'kb' / 'contraindications.pl',
+    PROJECT_ROOT / 'kb' / 'food_interactions.pl',
+    PROJECT_ROOT / 'kb' / 'food_notes.pl',
+    PROJECT_ROOT / 'kb' / 'rules.pl',
+]
+
+CONDITIONS = ['renal_impairment', 'hypertension', 'diabetes', 'hepatic_impairment',
+              'cardiovascular_disease', 'pregnancy', 'asthma']
+
+
+def load_kb() -> Prolog:
+    prolog = Prolog()
+    for kb in KB_FILES:
+        prolog.consult(str(kb))
+    return prolog
+
+
+def interacting_pairs(prolog: Prolog, n: int, seed: int = 0) -> list:
+    pairs = [(r['A'], r['B']) for r in prolog.query("interaction(A, B, _)")]
+    random.Random(seed).shuffle(pairs)
+    return pairs[:n]
+
+
+# ----------------------------
+# THE TWO PATHS
+# ----------------------------
+# String path: exactly what app.py did before the prepared layer.
+def string_check(prolog, drug_id, other_id):
+    conditions = [
+        c for c in CONDITIONS
+        if list(prolog.query(f"unsafe_for_condition('{drug_id}', {c})"))
+    ]
+    drugs = []
+    for r in prolog.query(f"unsafe_context('{drug_id}', drug('{other_id}'), Severity)"):
+        reason = list(prolog.query(f"explain_unsafe('{drug_id}', drug('{other_id}'), Reason)"))
+        drugs.append((str(r['Severity']), str(reason[0]['Reason']) if reason else 'interaction'))
+    foods = []
+    for r in list(prolog.query(f"unsafe_with_food('{drug_id}', Food)")):
+        reason = list(prolog.query(f"explain_unsafe('{drug_id}', food({r['Food']}), Reason)"))
+        foods.append((str(r['Food']), str(reason[0]['Reason']) if reason else 'interaction'))
+    return conditions, drugs, foods
+
+
+def prepared_check(q, drug_id, other_id):
+    conditions = [c for c in CONDITIONS if q['unsafe_for_condition'].exists(drug_id, c)]
+    drugs = []
+    for r in q['pair_severity'](drug_id, other_id):
+        reason = q['pair_reason'].first(drug_id, other_id)
+        drugs.append((r['Severity'], reason['Reason'] if reason else 'interaction'))
+    foods = []
+    for r in q['foods'](drug_id):
+        reason = q['food_reason'].first(drug_id, r['Food'])
+        foods.append((r['Food'], reason['Reason'] if reason else 'interaction'))
+    return conditions, drugs, foods
+
+
+def timed(fn, repeat: int):
+    best = float('inf')
+    out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+# ----------------------------
+# ENTRY POINT
+# ----------------------------
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare f-string queries with prepared queries on the app's checks."
+    )
+    parser.add_argument('--pairs', type=int, default=500,
+                        help="number of interacting drug pairs to check")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    prolog = load_kb()
+    q = prepare_app_queries(prolog)
+    pairs = interacting_pairs(prolog, args.pairs)
+    print(f"{len(pairs)} drug pairs, {len(CONDITIONS)} conditions each, "
+          f"best of {args.repeat}")
+
+    t_str, index_str = timed(
+        lambda: sorted((str(r['ID']), str(r['Name'])) for r in prolog.query("drug(ID, Name)")),
+        args.repeat,
+    )
+    t_prep, index_prep = timed(
+        lambda: sorted((r['ID'], r['Name']) for r in q['drugs']()),
+        args.repeat,
+    )
+    assert index_str == index_prep, "drug index differs between paths"
+    print(f"  build_drug_index ({len(index_prep)} drugs): "
+          f"string {t_str * 1000:.1f} ms, prepared {t_prep * 1000:.1f} ms "
+          f"({t_str / t_prep:.1f}x)")
+
+    t_str, res_str = timed(lambda: [string_check(prolog, a, b) for a, b in pairs], args.repeat)
+    t_bounded, res_bounded = timed(lambda: [prepared_check(q, a, b) for a, b in pairs], args.repeat)
+    budget = (prolog_queries.DEFAULT_TIME_LIMIT_S, prolog_queries.DEFAULT_INFERENCE_LIMIT)
+    prolog_queries.set_default_budget(0, 0)
+    t_prep, res_prep = timed(lambda: [prepared_check(q, a, b) for a, b in pairs], args.repeat)
+    prolog_queries.set_default_budget(*budget)
+    assert res_str == res_prep == res_bounded, "check results differ between paths"
+    n = len(pairs) or 1
+    print(f"  full check: string {t_str / n * 1e6:.0f} us/check, "
+          f"prepared {t_prep / n * 1e6:.0f} us/check ({t_str / t_prep:.1f}x), "
+          f"prepared with budgets {t_bounded / n * 1e6:.0f} us/check")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+import argparse
+import contextlib
+import filecmp
+import io
+import re
+import tempfile
+import time
+from pathlib import Path
+
+import xml_backend
+from xml_backend import NS, available_backends, iter_drugs
+
+import xml_to_classes_pl
+import xml_to_contradictions_pl
+import xml_to_drugs_pl
+import xml_to_food_interactions_pl
+import xml_to_interactions_pl
+
+# ----------------------------
+# PATH SETUP
+# ----------------------------
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+INPUTS = [
+    PROJECT_ROOT / 'data' / 'target_medicines.xml',
+    PROJECT_ROOT / 'one_medicine.xml',
+]
+
+# (module, entry point, {module attribute: output file name})
+CONVERTERS = [
+    (xml_to_drugs_pl, 'xml_to_drugs_pl', {'OUTPUT_PL': 'drugs.pl'}),
+    (xml_to_classes_pl, 'xml_to_classes_pl', {'OUTPUT_PL': 'classes.pl'}),
+    (xml_to_contradictions_pl, 'xml_to_contraindications_pl',
+     {'OUTPUT_PL': 'contraindications.pl'}),
+    (xml_to_food_interactions_pl, 'xml_to_food_interactions_pl',
+     {'OUTPUT_PL': 'food_interactions.pl', 'OUTPUT_NOTES_PL': 'food_notes.pl'}),
+    (xml_to_interactions_pl, 'xml_to_interactions_pl',
+     {'OUTPUT_PL': 'interactions.pl', 'OUTPUT_PROV': 'interactions.prov'}),
+]
+
+DRUG_START_RE = re.compile(rb'\n<drug\s')
+
+
+# ----------------------------
+# INPUT PREPARATION
+# ----------------------------
+def ensure_closed(path: Path, workdir: Path) -> Path:
+    """
+    one_medicine.xml is a cut-down sample without the closing
+    </drugbank> tag; give the parsers a well-formed copy.
+    """
+    with open(path, 'rb') as f:
+        f.seek(max(0, path.stat().st_size - 64))
+        tail = f.read()
+    if b'</drugbank>' in tail:
+        return path
+    fixed = workdir / path.name
+    fixed.write_bytes(path.read_bytes().rstrip() + b'\n</drugbank>\n')
+    return fixed
+
+
+def build_scaled_corpus(source: Path, copies: int, workdir: Path) -> Path:
+    """
+    Replicate the records of `source` `copies` times with fresh
+    primary IDs (DB9xxxx) to get a large, realistic-looking corpus.
+    """
+    data = source.read_bytes()
+    first = DRUG_START_RE.search(data)
+    end = data.rfind(b'</drugbank>')
+    header, body = data[:first.start() + 1], data[first.start() + 1:end]
+
+    out = workdir / f'scaled_x{copies}.xml'
+    with open(out, 'wb') as f:
+        f.write(header)
+        for i in range(copies):
+            f.write(re.sub(
+                rb'<drugbank-id primary="true">DB\d+</drugbank-id>',
+                b'<drugbank-id primary="true">DB9%04d</drugbank-id>' % i,
+                body,
+            ))
+        f.write(b'</drugbank>\n')
+    return out
+
+
+# ----------------------------
+# BENCHMARK
+# ----------------------------
+def parse_pass(path: Path, backend: str) -> int:
+    """One converter-shaped pass: touch the fields the converters read."""
+    count = 0
+    for drug in iter_drugs(path, backend):
+        drug.findtext("db:drugbank-id[@primary='true']", namespaces=NS)
+        drug.findtext('db:name', namespaces=NS)
+        drug.findall('db:drug-interactions/db:drug-interaction', NS)
+        drug.findall('db:categories/db:category/db:category', NS)
+        count += 1
+    return count
+
+
+def bench_file(path: Path, backend: str, repeat: int) -> dict:
+    best = None
+    drugs = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        drugs = parse_pass(path, backend)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    mb = path.stat().st_size / 1e6
+    return {
+        'drugs': drugs,
+        'seconds': best,
+        'mb_per_s': mb / best if best else float('inf'),
+        'drugs_per_s': drugs / best if best else float('inf'),
+    }
+
+
+def run_converters(path: Path, backend: str, outdir: Path):
+    outdir.mkdir(parents=True, exist_ok=True)
+    xml_backend.set_backend(backend)
+    for module, entry, outputs in CONVERTERS:
+        module.INPUT_XML = path
+        for attr, name in outputs.items():
+            setattr(module, attr, outdir / name)
+        with contextlib.redirect_stdout(io.StringIO()):
+            getattr(module, entry)()
+
+
+def check_identical(path: Path, backends: list, workdir: Path) -> list:
+    """Run every converter per backend; return files that differ."""
+    dirs = {}
+    for backend in backends:
+        dirs[backend] = workdir / f'out_{path.stem}_{backend}'
+        run_converters(path, backend, dirs[backend])
+
+    reference = dirs[backends[0]]
+    names = sorted(p.name for p in reference.iterdir())
+    differing = []
+    for backend in backends[1:]:
+        _, mismatch, errors = filecmp.cmpfiles(
+            reference, dirs[backend], names, shallow=False
+        )
+        differing.extend(f'{backend}:{n}' for n in mismatch + errors)
+    return differing
+
+
+# ----------------------------
+# ENTRY POINT
+# ----------------------------
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare XML parser backends on the DrugBank converters."
+    )
+    parser.add_argument('--scale', type=int, default=50,
+                        help="copies of one_medicine.xml in the synthetic corpus")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('inputs', nargs='*', type=Path,
+                        help="extra XML files to benchmark")
+    args = parser.parse_args()
+
+    backends = available_backends()
+    if len(backends) < 2:
+        print("⚠️  lxml is not installed; only the stdlib backend is measured.")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        inputs = [ensure_closed(p, workdir) for p in INPUTS + args.inputs if p.exists()]
+        sample = next((p for p in inputs if p.name == 'one_medicine.xml'), None)
+        if sample is not None and args.scale > 0:
+            inputs.append(build_scaled_corpus(sample, args.scale, workdir))
+
+        print(f"{'input':<28}{'backend':<9}{'drugs':>8}{'MB':>9}"
+              f"{'MB/s':>10}{'drugs/s':>12}{'speedup':>9}")
+        for path in inputs:
+            baseline = None
+            for backend in reversed(backends):          # stdlib first
+                r = bench_file(path, backend, args.repeat)
+                baseline = baseline or r['seconds']
+                print(f"{path.name:<28}{backend:<9}{r['drugs']:>8}"
+                      f"{path.stat().st_size / 1e6:>9.1f}{r['mb_per_s']:>10.1f}"
+                      f"{r['drugs_per_s']:>12.1f}{baseline / r['seconds']:>8.2f}x")
+
+        if len(backends) > 1:
+            for path in inputs:
+                differing = check_identical(path, backends, workdir)
+                if differing:
+                    print(f"❌ Output differs for {path.name}: {', '.join(differing)}")
+                else:
+                    print(f"✅ Identical converter output for {path.name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+import argparse
+import csv
+import re
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from check_cache import CheckCache
+
+# ----------------------------
+# PATH SETUP
+# ----------------------------
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+SESSION_LOG = PROJECT_ROOT / 'logs' / 'sessions.csv'
+
+# ----------------------------
+# CONFIG
+# ----------------------------
+DEFAULT_TOP_N = 50
+DEFAULT_BUDGET_S = 5.0
+DEFAULT_WINDOW_DAYS = 30
+
+# log_session() stores medication *labels*, e.g. 'Ibuprofen (DB01050)'
+LABEL_ID_RE = re.compile(r'\((DB\d+)\)')
+
+
+# ----------------------------
+# LOG ANALYSIS
+# ----------------------------
+def read_sessions(log_path=SESSION_LOG, window_days: int = DEFAULT_WINDOW_DAYS) -> list:
+    """
+    Parse logs/sessions.csv into (drug_id, med_ids, conditions) tuples,
+    keeping only checks from the last `window_days` days (None = all).
+    """
+    log_path = Path(log_path)
+    if not log_path.exists():
+        return []
+
+    cutoff = None
+    if window_days is not None:
+        cutoff = datetime.now() - timedelta(days=window_days)
+
+    sessions = []
+    with open(log_path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            drug_id = (row.get('query_drug_id') or '').strip()
+            if not drug_id:
+                continue
+            if cutoff is not None:
+                try:
+                    if datetime.fromisoformat(row['timestamp']) < cutoff:
+                        continue
+                except (KeyError, TypeError, ValueError):
+                    continue
+            meds = tuple(sorted(set(LABEL_ID_RE.findall(row.get('current_meds') or ''))))
+            conds = tuple(sorted({
+                c.strip() for c in (row.get('conditions') or '').split(';') if c.strip()
+            }))
+            sessions.append((drug_id, meds, conds))
+    return sessions
+
+
+def plan_warmup(sessions: list, top_n: int = DEFAULT_TOP_N) -> dict:
+    """
+    Most frequent full checks and (query drug, current med) pairs.
+    """
+    combos = Counter(sessions)
+    pairs = Counter(
+        (drug_id, med) for drug_id, meds, _ in sessions for med in meds
+        if med != drug_id
+    )
+    return {
+        'combos': [c for c, _ in combos.most_common(top_n)],
+        'pairs': [p for p, _ in pairs.most_common(top_n)],
+        'combo_counts': combos,
+        'pair_counts': pairs,
+    }
+
+
+# ----------------------------
+# WARM-UP
+# ----------------------------
+def warm_cache(cache: CheckCache, plan: dict, compute_check, compute_pair,
+               budget_s: float = DEFAULT_BUDGET_S, cacheable=None) -> dict:
+    """
+    Pre-compute planned checks and pairs into `cache` until done or the
+    time budget runs out. Most frequent entries go first, so a cut-off
+    warm-up still covers the heaviest traffic.
+
+    compute_check(drug_id, med_ids, conditions) and
+    compute_pair(drug_id, other_id) are the app's uncached check functions;
+    results rejected by `cacheable(value)` are not stored.
+    """
+    def store(key, value):
+        if cacheable is None or cacheable(value):
+            cache.put(key, value)
+
+    t0 = time.perf_counter()
+    deadline = t0 + budget_s
+    warmed_combos = 0
+    warmed_pairs = 0
+    out_of_time = False
+
+    for drug_id, meds, conds in plan['combos']:
+        if time.perf_counter() >= deadline:
+            out_of_time = True
+            break
+        key = CheckCache.check_key(drug_id, meds, conds)
+        if key not in cache:
+            store(key, compute_check(drug_id, meds, conds))
+        warmed_combos += 1
+
+    if not out_of_time:
+        for drug_id, other_id in plan['pairs']:
+            if time.perf_counter() >= deadline:
+                out_of_time = True
+                break
+            key = CheckCache.pair_key(drug_id, other_id)
+            if key not in cache:
+                store(key, compute_pair(drug_id, other_id))
+            warmed_pairs += 1
+
+    # live hit/miss counters should describe real traffic only
+    cache.reset_stats()
+
+    return {
+        'combos_warmed': warmed_combos,
+        'combos_planned': len(plan['combos']),
+        'pairs_warmed': warmed_pairs,
+        'pairs_planned': len(plan['pairs']),
+        'seconds': time.perf_counter() - t0,
+        'budget_exhausted': out_of_time,
+        **projected_hit_rates(cache, plan),
+    }
+
+
+def projected_hit_rates(cache: CheckCache, plan: dict) -> dict:
+    """
+    Share of the analysed historical traffic that the warm cache would
+    have served: full checks and individual pair lookups.
+    """
+    combo_total = sum(plan['combo_counts'].values())
+    combo_hits = sum(
+        n for (d, m, c), n in plan['combo_counts'].items()
+        if CheckCache.check_key(d, m, c) in cache
+    )
+    pair_total = sum(plan['pair_counts'].values())
+    pair_hits = sum(
+        n for (d, o), n in plan['pair_counts'].items()
+        if CheckCache.pair_key(d, o) in cache
+    )
+    return {
+        'check_hit_rate': combo_hits / combo_total if combo_total else 0.0,
+        'pair_hit_rate': pair_hits / pair_total if pair_total else 0.0,
+    }
+
+
+def warm_from_logs(cache: CheckCache, compute_check, compute_pair,
+                   log_path=SESSION_LOG, top_n: int = DEFAULT_TOP_N,
+                   budget_s: float = DEFAULT_BUDGET_S,
+                   window_days: int = DEFAULT_WINDOW_DAYS, cacheable=None) -> dict:
+    sessions = read_sessions(log_path, window_days)
+    plan = plan_warmup(sessions, top_n)
+    report = warm_cache(cache, plan, compute_check, compute_pair, budget_s, cacheable)
+    report['sessions_analysed'] = len(sessions)
+    return report
+
+
+# ----------------------------
+# ENTRY POINT
+# ----------------------------
+def main():
+    """Print the warm-up plan for the current log (no Prolog needed)."""
+    parser = argparse.ArgumentParser(
+        description="Show the most frequent checks in the session log."
+    )
+    parser.add_argument('--log', type=Path, default=SESSION_LOG)
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP_N)
+    parser.add_argument('--days', type=int, default=DEFAULT_WINDOW_DAYS)
+    args = parser.parse_args()
+
+    sessions = read_sessions(args.log, args.days)
+    plan = plan_warmup(sessions, args.top)
+    total = len(sessions)
+    print(f"{total} checks in the last {args.days} days")
+
+    covered = sum(plan['combo_counts'][c] for c in plan['combos'])
+    print(f"Top {len(plan['combos'])} checks cover "
+          f"{covered / total if total else 0:.1%} of traffic:")
+    for drug_id, meds, conds in plan['combos'][:10]:
+        n = plan['combo_counts'][(drug_id, meds, conds)]
+        print(f"  {n:>6}  {drug_id}  meds={','.join(meds) or '-'}  "
+              f"conditions={','.join(conds) or '-'}")
+
+    pair_total = sum(plan['pair_counts'].values())
+    pair_covered = sum(plan['pair_counts'][p] for p in plan['pairs'])
+    print(f"Top {len(plan['pairs'])} drug pairs cover "
+          f"{pair_covered / pair_total if pair_total else 0:.1%} of pair lookups")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+import threading
+from collections import OrderedDict
+
+
+class CheckCache:
+    """
+    Thread-safe LRU cache for safety-check results, shared by all
+    Streamlit sessions of one server process.
+
+    Two kinds of entries are stored:
+      - check keys: a full (query drug, current meds, conditions) check
+      - pair keys:  one (query drug, other drug) interaction lookup
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # ----------------------------
+    # KEYS
+    # ----------------------------
+    @staticmethod
+    def check_key(drug_id: str, med_ids, conditions) -> tuple:
+        return ('check', drug_id, tuple(sorted(set(med_ids))),
+                tuple(sorted(set(conditions))))
+
+    @staticmethod
+    def pair_key(drug_id: str, other_id: str) -> tuple:
+        return ('pair', drug_id, other_id)
+
+    # ----------------------------
+    # ACCESS
+    # ----------------------------
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, key, compute, cacheable=None):
+        """
+        Return the cached value for `key`, computing and storing it on a
+        miss. `compute` runs outside the lock (Prolog calls can be slow).
+        If given, `cacheable(value)` decides whether a fresh value is
+        stored (e.g. not when a query budget cut it short).
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            if cacheable is None or cacheable(value):
+                self.put(key, value)
+        return value
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,179 @@
+import cProfile
+import os
+import pstats
+import re
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+# ----------------------------
+# PATH SETUP
+# ----------------------------
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+PROFILE_DIR = PROJECT_ROOT / 'logs' / 'profiles'
+
+# ----------------------------
+# CONFIG
+# ----------------------------
+# MEDSAFE_PROFILE=1 profiles every check; otherwise only requests that
+# ask for it (e.g. ?profile=1 in the app URL).
+PROFILE_ENV = 'MEDSAFE_PROFILE'
+
+MAX_STACK_DEPTH = 64
+
+# One row per predicate from SWI-Prolog's profile_data/1
+# (call/redo/exit port counts plus sampled ticks).
+PROLOG_NODES_QUERY = (
+    "profile_data(D), get_dict(nodes, D, Nodes), member(N, Nodes), "
+    "get_dict(predicate, N, P), term_to_atom(P, Pred), "
+    "get_dict(call, N, Call), get_dict(redo, N, Redo), get_dict(exit, N, Exit), "
+    "get_dict(ticks_self, N, Self), get_dict(ticks_siblings, N, Siblings)"
+)
+PROLOG_SUMMARY_QUERY = (
+    "profile_data(D), get_dict(summary, D, S), "
+    "get_dict(ticks, S, Ticks), get_dict(time, S, Time)"
+)
+
+
+def profiling_enabled(request_flag: bool = False) -> bool:
+    env = os.environ.get(PROFILE_ENV, '').strip().lower()
+    return bool(request_flag) or env not in ('', '0', 'false', 'no')
+
+
+# ----------------------------
+# PROFILE SESSION
+# ----------------------------
+class CheckProfile:
+    """
+    Python (cProfile) + Prolog (SWI profiler) profile of one request.
+
+    Only ever constructed when profiling is enabled; callers keep a
+    plain `None` otherwise, so the disabled path costs one `if`.
+    """
+
+    def __init__(self, name: str, prolog=None, out_dir=PROFILE_DIR):
+        stamp = datetime.now().strftime('%Y%m%dT%H%M%S_%f')
+        safe = re.sub(r'[^A-Za-z0-9_.-]+', '_', name)
+        self.out_dir = Path(out_dir) / f'{stamp}_{safe}'
+        self.prolog = prolog
+        self.prolog_error = None
+        self.python = cProfile.Profile()
+        self.t0 = None
+
+    def start(self):
+        if self.prolog is not None:
+            try:
+                list(self.prolog.query("reset_profiler"))
+                list(self.prolog.query("profiler(_, cputime)"))
+            except Exception as e:
+                self.prolog_error = str(e)
+                self.prolog = None
+        self.t0 = time.perf_counter()
+        self.python.enable()
+        return self
+
+    def finish(self) -> Path:
+        """Stop both profilers and write the per-request files."""
+        self.python.disable()
+        wall = time.perf_counter() - self.t0
+
+        prolog_rows, prolog_summary = [], None
+        if self.prolog is not None:
+            try:
+                list(self.prolog.query("profiler(_, false)"))
+                prolog_rows = list(self.prolog.query(PROLOG_NODES_QUERY))
+                summary = list(self.prolog.query(PROLOG_SUMMARY_QUERY))
+                prolog_summary = summary[0] if summary else None
+            except Exception as e:
+                self.prolog_error = str(e)
+
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+
+        stats = pstats.Stats(self.python)
+        stats.dump_stats(str(self.out_dir / 'python.pstats'))
+
+        collapsed = pstats_to_collapsed(stats)
+        collapsed.update(prolog_to_collapsed(prolog_rows, prolog_summary))
+        with open(self.out_dir / 'check.collapsed', 'w', encoding='utf-8') as f:
+            for stack, us in sorted(collapsed.items()):
+                if us >= 1:
+                    f.write(f'{stack} {int(us)}\n')
+
+        with open(self.out_dir / 'prolog.txt', 'w', encoding='utf-8') as f:
+            f.write(f'wall time (python side): {wall * 1000:.1f} ms\n')
+            if self.prolog_error:
+                f.write(f'prolog profiler unavailable: {self.prolog_error}\n')
+            if prolog_summary:
+                f.write(f"prolog cpu time: {float(prolog_summary['Time']) * 1000:.1f} ms, "
+                        f"ticks: {prolog_summary['Ticks']}\n")
+            f.write(f"\n{'predicate':<48}{'call':>10}{'redo':>10}{'exit':>10}"
+                    f"{'self':>8}{'children':>10}\n")
+            for r in sorted(prolog_rows, key=lambda r: -int(r['Call'])):
+                f.write(f"{str(r['Pred']):<48}{r['Call']:>10}{r['Redo']:>10}{r['Exit']:>10}"
+                        f"{r['Self']:>8}{r['Siblings']:>10}\n")
+
+        return self.out_dir
+
+
+# ----------------------------
+# COLLAPSED STACKS (flamegraph.pl / speedscope input)
+# ----------------------------
+def _frame(func) -> str:
+    filename, lineno, name = func
+    if filename == '~':
+        label = name
+    else:
+        label = f'{Path(filename).name}:{lineno}({name})'
+    return label.replace(';', ':').replace(' ', '_')
+
+
+def pstats_to_collapsed(stats: pstats.Stats) -> Counter:
+    """
+    Rebuild 'root;caller;callee self_us' lines from cProfile's caller
+    graph. Time below a function is split across its callers in
+    proportion to the cumulative time each caller accounts for.
+    """
+    raw = stats.stats
+    callees = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    out = Counter()
+
+    def walk(func, stack, scale):
+        _, _, tt, ct, _ = raw[func]
+        path = stack + (_frame(func),)
+        out['python;' + ';'.join(path)] += tt * scale * 1e6
+        if len(path) >= MAX_STACK_DEPTH:
+            return
+        for child, edge_ct in callees.get(func, ()):
+            child_ct = raw[child][3]
+            if child_ct <= 0 or _frame(child) in path:
+                continue
+            walk(child, path, scale * edge_ct / child_ct)
+
+    # Roots: time not accounted for by any profiled caller (e.g. calls
+    # made from the frame that started the profiler).
+    for func, (_, _, _, ct, callers) in raw.items():
+        if ct <= 0:
+            continue
+        residual = ct - sum(edge[3] for edge in callers.values())
+        if not callers or residual > 1e-9:
+            walk(func, (), residual / ct if callers else 1.0)
+    return out
+
+
+def prolog_to_collapsed(rows: list, summary) -> Counter:
+    """Flat 'prolog;<predicate> self_us' lines from sampled ticks."""
+    out = Counter()
+    if not rows or not summary:
+        return out
+    ticks = int(summary['Ticks']) or 1
+    us_per_tick = float(summary['Time']) * 1e6 / ticks
+    for r in rows:
+        pred = str(r['Pred']).replace(';', ':').replace(' ', '_')
+        out[f'prolog;{pred}'] += int(r['Self']) * us_per_tick
+    return out
@@ -0,0 +1,273 @@
+import argparse
+import csv
+import time
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+from kb_encoding import SEVERITY_WEIGHTS, interaction_table, severity_weight
+from kb_store import OUTPUT_DB, KBStore
+from regimens import read_regimens, synthetic_regimens
+
+# ----------------------------
+# PATH SETUP
+# ----------------------------
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+REPORT_DIR = PROJECT_ROOT / 'reports'
+SCORES_CSV = REPORT_DIR / 'cohort_risk.csv'
+
+# ----------------------------
+# CONFIG
+# ----------------------------
+# Interaction and food effects are weighted like severity_to_confidence()
+# in app.py (major/HIGH=3, moderate or unmapped/MED=2, minor/LOW=1).
+# The UI shows a contraindication as an outright "not safe", so it
+# counts like a major interaction.
+CONTRAINDICATION_WEIGHT = SEVERITY_WEIGHTS['major']
+
+LEVELS = ('major', 'moderate', 'minor')
+
+BREAKDOWN = (
+    'major_interactions', 'moderate_interactions', 'minor_interactions',
+    'contraindications', 'food_exposures',
+    'interaction_score', 'contraindication_score', 'food_score', 'score',
+)
+
+
+# ----------------------------
+# KB AS ARRAYS
+# ----------------------------
+class RiskModel:
+    """
+    The KB relations the score needs, encoded against fixed drug and
+    condition column orders:
+
+      pair_keys      sorted i * n + j (i < j) of interacting drug pairs
+      pair_weights   severity weight of each pair's most severe interaction
+      contra         drug x condition, 1 where contraindicated/2 holds
+      food_weight    per drug, summed weights of its food_interaction/3 effects
+      food_count     per drug, number of risky foods
+    """
+
+    def __init__(self, store: KBStore, drug_ids: list, condition_ids: list = ()):
+        self.drug_ids = list(drug_ids)
+        self.condition_ids = list(condition_ids)
+        drug_index = {d: i for i, d in enumerate(self.drug_ids)}
+        cond_index = {c: i for i, c in enumerate(self.condition_ids)}
+        n = len(self.drug_ids)
+
+        table = interaction_table(store, drug_index)
+        self.pair_keys = table['keys']
+        self.pair_weights = table['weights']
+
+        c_rows, c_cols = [], []
+        for drug_id, condition in store.iter_contraindications():
+            i, j = drug_index.get(drug_id), cond_index.get(condition)
+            if i is not None and j is not None:
+                c_rows.append(i)
+                c_cols.append(j)
+        self.contra = sparse.csr_matrix(
+            (np.ones(len(c_rows), dtype=np.int32), (c_rows, c_cols)),
+            shape=(n, len(self.condition_ids)),
+        )
+        self.contra.sum_duplicates()
+        self.contra.data[:] = 1
+
+        # one exposure per (drug, food), at its most severe effect
+        best = {}
+        for drug_id, food, _, severity in store.iter_food_interactions():
+            i = drug_index.get(drug_id)
+            if i is not None:
+                best[(i, food)] = max(best.get((i, food), 0), severity_weight(severity))
+        self.food_weight = np.zeros(n, dtype=np.int32)
+        self.food_count = np.zeros(n, dtype=np.int32)
+        for (i, _), w in best.items():
+            self.food_weight[i] += w
+            self.food_count[i] += 1
+
+
+# ----------------------------
+# SCORING
+# ----------------------------
+PAIRS_PER_CHUNK = 4_000_000
+
+
+def iter_regimen_pairs(X: sparse.csr_matrix, pairs_per_chunk: int = PAIRS_PER_CHUNK):
+    """
+    Every drug pair (a < b) inside each patient's regimen, as parallel
+    arrays (patient row, a, b), in bounded-size chunks.
+
+    Rows are grouped by regimen size k, so one group's drug columns form
+    an (m, k) array and its pairs are two fancy-indexing gathers with
+    np.triu_indices(k, 1) -- no Python loop over patients.
+    """
+    X = X.tocsr()
+    X.sort_indices()
+    sizes = np.diff(X.indptr)
+    for k in np.unique(sizes):
+        if k < 2:
+            continue
+        iu, ju = np.triu_indices(k, 1)
+        group = np.flatnonzero(sizes == k)
+        step = max(1, pairs_per_chunk // len(iu))
+        for start in range(0, len(group), step):
+            rows = group[start:start + step]
+            cols = X.indices[X.indptr[rows][:, None] + np.arange(k)]
+            yield (np.repeat(rows, len(iu)),
+                   cols[:, iu].ravel(),
+                   cols[:, ju].ravel())
+
+
+def score_cohort(model: RiskModel, X: sparse.csr_matrix, P: sparse.csr_matrix = None) -> dict:
+    """
+    Score every patient (row of X, and of P for conditions) at once.
+
+    Pairs among a patient's drugs come from iter_regimen_pairs() and are
+    matched against the sorted interaction keys with one searchsorted
+    per chunk; bincount folds the hits back onto patients.
+    Contraindications: (X @ C).multiply(P) counts (drug, condition) hits.
+    Food: X @ food_weight sums each drug's risky-food weights.
+
+    Returns {name: array over patients} for every name in BREAKDOWN.
+    """
+    def row_sums(m) -> np.ndarray:
+        return np.asarray(m.sum(axis=1)).ravel().astype(np.int64)
+
+    n_patients = X.shape[0]
+    n_drugs = len(model.drug_ids)
+    keys = model.pair_keys
+    counts = {level: np.zeros(n_patients, dtype=np.int64) for level in LEVELS}
+    if len(keys):
+        for rows, a, b in iter_regimen_pairs(X):
+            pair = a.astype(np.int64) * n_drugs + b
+            pos = np.minimum(np.searchsorted(keys, pair), len(keys) - 1)
+            hit = keys[pos] == pair
+            rows, weights = rows[hit], model.pair_weights[pos[hit]]
+            for level in LEVELS:
+                counts[level] += np.bincount(
+                    rows[weights == SEVERITY_WEIGHTS[level]], minlength=n_patients
+                )
+
+    out = {}
+    interaction_score = np.zeros(n_patients, dtype=np.int64)
+    for level in LEVELS:
+        out[f'{level}_interactions'] = counts[level]
+        interaction_score += counts[level] * SEVERITY_WEIGHTS[level]
+
+    if P is not None and P.shape[1] and model.contra.shape[1]:
+        contra = row_sums((X @ model.contra).multiply(P))
+    else:
+        contra = np.zeros(n_patients, dtype=np.int64)
+    out['contraindications'] = contra
+
+    out['food_exposures'] = (X @ model.food_count).astype(np.int64)
+    food_score = (X @ model.food_weight).astype(np.int64)
+
+    out['interaction_score'] = interaction_score
+    out['contraindication_score'] = contra * CONTRAINDICATION_WEIGHT
+    out['food_score'] = food_score
+    out['score'] = interaction_score + out['contraindication_score'] + food_score
+    return out
+
+
+def patient_breakdown(scores: dict, row: int) -> dict:
+    return {name: int(scores[name][row]) for name in BREAKDOWN}
+
+
+# ----------------------------
+# REPORT
+# ----------------------------
+def write_scores(scores: dict, patients: list, path=SCORES_CSV):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    order = np.argsort(-scores['score'], kind='stable')
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['patient_id', *BREAKDOWN])
+        columns = [scores[name] for name in BREAKDOWN]
+        for r in order:
+            writer.writerow([patients[r], *(int(c[r]) for c in columns)])
+
+
+def score_file(store: KBStore, regimen_path, out_path=SCORES_CSV, top: int = 10):
+    t0 = time.perf_counter()
+    regimens = read_regimens(regimen_path)
+    model = RiskModel(store, regimens['drug_ids'], regimens['condition_ids'])
+    t1 = time.perf_counter()
+    scores = score_cohort(model, regimens['X'], regimens['P'])
+    t2 = time.perf_counter()
+    write_scores(scores, regimens['patients'], out_path)
+
+    n = len(regimens['patients'])
+    print(f"Scored {n:,} patients in {t2 - t1:.2f}s "
+          f"(load + encode {t1 - t0:.2f}s) -> {out_path}")
+    if not n:
+        return
+    s = scores['score']
+    print(f"Score: mean {s.mean():.2f}, p50 {np.percentile(s, 50):.0f}, "
+          f"p95 {np.percentile(s, 95):.0f}, max {s.max()}; "
+          f"{int((s > 0).sum()):,} patients with any risk")
+    print(f"\nTop {top} patients:")
+    for r in np.argsort(-s, kind='stable')[:top]:
+        b = patient_breakdown(scores, r)
+        print(f"  {regimens['patients'][r]:<16}{b['score']:>6}  "
+              f"interactions {b['major_interactions']}/{b['moderate_interactions']}/"
+              f"{b['minor_interactions']} (major/moderate/minor), "
+              f"contraindications {b['contraindications']}, foods {b['food_exposures']}")
+
+
+# ----------------------------
+# BENCHMARK
+# ----------------------------
+def bench(store: KBStore, sizes=(10_000, 100_000, 1_000_000), mean_drugs: float = 5.0):
+    """Throughput on synthetic cohorts over the KB's drugs and conditions."""
+    drug_ids = [d for d, _ in store.drugs()]
+    drug_ids += sorted({d for a, b, _, _ in store.iter_interactions() for d in (a, b)}
+                       - set(drug_ids))
+    condition_ids = sorted({c for _, c in store.iter_contraindications()})
+
+    t0 = time.perf_counter()
+    model = RiskModel(store, drug_ids, condition_ids)
+    print(f"Encoded KB: {len(drug_ids):,} drugs, {len(condition_ids)} conditions "
+          f"in {time.perf_counter() - t0:.2f}s")
+
+    for n in sizes:
+        cohort = synthetic_regimens(n, len(drug_ids), mean_drugs,
+                                    n_conditions=len(condition_ids))
+        t0 = time.perf_counter()
+        scores = score_cohort(model, cohort['X'], cohort['P'])
+        elapsed = time.perf_counter() - t0
+        print(f"  {n:>9,} patients: {elapsed:.3f}s "
+              f"({n / elapsed:,.0f} patients/s), "
+              f"{int((scores['score'] > 0).sum()):,} with any risk")
+
+
+# ----------------------------
+# ENTRY POINT
+# ----------------------------
+def main():
+    parser = argparse.ArgumentParser(
+        description="Score medication risk for a whole cohort at once."
+    )
+    parser.add_argument('regimens', type=Path, nargs='?',
+                        help="CSV of patient_id,drugs[,conditions]")
+    parser.add_argument('--db', type=Path, default=OUTPUT_DB)
+    parser.add_argument('-o', '--output', type=Path, default=SCORES_CSV)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--bench', type=int, nargs='*', metavar='N',
+                        help="time synthetic cohorts (default 10k, 100k, 1M patients)")
+    args = parser.parse_args()
+
+    store = KBStore(args.db)
+    if args.bench is not None:
+        bench(store, args.bench or (10_000, 100_000, 1_000_000))
+        return
+
+    if args.regimens is None:
+        parser.error("a regimen file is required (or use --bench)")
+    score_file(store, args.regimens, args.output, args.top)
+
+
+if __name__ == '__main__':
+    main()
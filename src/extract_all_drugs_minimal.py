@@ -2,6 +2,8 @@ import os
 import xml.etree.ElementTree as ET
 from pathlib import Path
 
+from xml_backend import iter_drugs, to_stdlib
+
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 INPUT_FILE_PATH = PROJECT_ROOT / 'data' / 'full database.xml'
 OUTPUT_FILE_PATH = PROJECT_ROOT / 'data' / 'all_drugs_minimal.xml'
@@ -25,48 +27,45 @@ def extract_all_drugs_minimal():
             b'<drugbank xmlns="http://www.drugbank.ca">\n'
         )
 
-        context = ET.iterparse(absolute_input, events=('end',))
         count = 0
 
-        for event, elem in context:
-            if elem.tag == f'{{{NS_URL}}}drug':
-
-                drug_id_el = elem.find(
-                    "db:drugbank-id[@primary='true']",
-                    NS
-                )
-                name_el = elem.find("db:name", NS)
+        # Records are read with the configured parser backend; the trimmed
+        # output is always built and serialized with xml.etree.
+        for elem in iter_drugs(absolute_input):
+            drug_id_el = elem.find(
+                "db:drugbank-id[@primary='true']",
+                NS
+            )
+            name_el = elem.find("db:name", NS)
 
-                if drug_id_el is None or name_el is None:
-                    elem.clear()
-                    continue
+            if drug_id_el is None or name_el is None:
+                continue
 
-                # Create NEW trimmed drug element
-                drug = ET.Element(f'{{{NS_URL}}}drug')
+            # Create NEW trimmed drug element
+            drug = ET.Element(f'{{{NS_URL}}}drug')
 
-                ET.SubElement(drug, f'{{{NS_URL}}}drugbank-id').text = drug_id_el.text
-                ET.SubElement(drug, f'{{{NS_URL}}}name').text = name_el.text
+            ET.SubElement(drug, f'{{{NS_URL}}}drugbank-id').text = drug_id_el.text
+            ET.SubElement(drug, f'{{{NS_URL}}}name').text = name_el.text
 
-                # Indication
-                indication = elem.find("db:indication", NS)
-                if indication is not None:
-                    ET.SubElement(drug, f'{{{NS_URL}}}indication').text = indication.text
+            # Indication
+            indication = elem.find("db:indication", NS)
+            if indication is not None:
+                ET.SubElement(drug, f'{{{NS_URL}}}indication').text = indication.text
 
-                # Drug interactions
-                drug_interactions = elem.find("db:drug-interactions", NS)
-                if drug_interactions is not None:
-                    drug.append(drug_interactions)
+            # Drug interactions
+            drug_interactions = elem.find("db:drug-interactions", NS)
+            if drug_interactions is not None:
+                drug.append(to_stdlib(drug_interactions))
 
-                # Food interactions
-                food_interactions = elem.find("db:food-interactions", NS)
-                if food_interactions is not None:
-                    drug.append(food_interactions)
+            # Food interactions
+            food_interactions = elem.find("db:food-interactions", NS)
+            if food_interactions is not None:
+                drug.append(to_stdlib(food_interactions))
 
-                f.write(ET.tostring(drug, encoding='utf-8'))
-                f.write(b'\n')
+            f.write(ET.tostring(drug, encoding='utf-8'))
+            f.write(b'\n')
 
-                count += 1
-                elem.clear()
+            count += 1
 
         f.write(b'</drugbank>')
         print(f"✅ Extracted {count} drugs to {OUTPUT_FILE_PATH}")
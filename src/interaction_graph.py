@@ -0,0 +1,365 @@
+import argparse
+import json
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+
+from kb_encoding import interaction_table, severity_weight
+from kb_store import OUTPUT_DB, KBStore
+
+# ----------------------------
+# PATH SETUP
+# ----------------------------
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+GRAPH_NPZ = PROJECT_ROOT / 'kb' / 'interaction_graph.npz'
+REPORT_JSON = PROJECT_ROOT / 'reports' / 'interaction_graph.json'
+
+# ----------------------------
+# CONFIG
+# ----------------------------
+# Drugs whose 2-hop neighbourhood is precomputed. Hubs are where an
+# on-the-fly expansion is expensive (thousands of neighbours, each with
+# its own list); for everyone else it is a handful of CSR slices.
+DEFAULT_HUBS = 100
+TOP_COMPONENTS = 10
+
+
+# ----------------------------
+# BUILD
+# ----------------------------
+def build_graph(store: KBStore, hubs: int = DEFAULT_HUBS) -> dict:
+    """
+    interaction/3 as an undirected graph over every known drug.
+
+    Nodes are drug IDs (sorted; drugs without interactions included).
+    Each unordered pair is one edge, stored in both directions of a CSR
+    adjacency; its effect is the pair's most severe one, as in
+    interaction_table(). Also returns per-effect fact counts and the
+    exactly-2-hop neighbourhoods of the `hubs` highest-degree drugs.
+    """
+    names = dict(store.drugs())
+    effect_facts = Counter()
+    endpoints = set()
+    for a, b, effect, _ in store.iter_interactions():
+        endpoints.update((a, b))
+        if a != b:
+            effect_facts[effect] += 1
+    drug_ids = sorted(set(names) | endpoints)
+    drug_index = {d: i for i, d in enumerate(drug_ids)}
+    n = len(drug_ids)
+
+    table = interaction_table(store, drug_index)
+    rows, cols = np.divmod(table['keys'], n)
+    adjacency = sparse.csr_matrix(
+        (np.concatenate([table['codes'], table['codes']]).astype(np.int16),
+         (np.concatenate([rows, cols]), np.concatenate([cols, rows]))),
+        shape=(n, n),
+    )
+    adjacency.sort_indices()
+
+    graph = {
+        'drug_ids': drug_ids,
+        'names': [names.get(d, '') for d in drug_ids],
+        'indptr': adjacency.indptr.astype(np.int64),
+        'indices': adjacency.indices.astype(np.int32),
+        'effect': adjacency.data,
+        'effects': table['effects'],
+        'severities': [s or '' for s in table['severities']],
+        'effect_facts': [effect_facts[e] for e in table['effects']],
+    }
+    graph.update(two_hop_table(graph, hub_rows(graph, hubs)))
+    return graph
+
+
+def adjacency_matrix(graph: dict) -> sparse.csr_matrix:
+    n = len(graph['drug_ids'])
+    return sparse.csr_matrix(
+        (np.ones(len(graph['indices']), dtype=np.int32), graph['indices'], graph['indptr']),
+        shape=(n, n),
+    )
+
+
+def degrees(graph: dict) -> np.ndarray:
+    return np.diff(graph['indptr'])
+
+
+def hub_rows(graph: dict, hubs: int = DEFAULT_HUBS) -> np.ndarray:
+    """Node indices of the `hubs` highest-degree drugs (ties by drug ID)."""
+    deg = degrees(graph)
+    order = np.lexsort((np.arange(len(deg)), -deg))
+    return order[:min(hubs, int((deg > 0).sum()))]
+
+
+def two_hop_table(graph: dict, rows: np.ndarray) -> dict:
+    """
+    Exactly-2-hop neighbourhoods of `rows`: drugs that share an
+    interaction partner with the hub but do not interact with it
+    directly. One sparse product R @ A for all hubs at once.
+    """
+    A = adjacency_matrix(graph)
+    R = A[rows]
+    reach = (R @ A).tocsr()
+    own = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int32), (np.arange(len(rows)), rows)),
+        shape=R.shape,
+    )
+    reach = reach - reach.multiply(R + own)       # drop direct partners and the hub
+    reach.eliminate_zeros()
+    reach.sort_indices()
+    return {
+        'hub_rows': np.asarray(rows, dtype=np.int32),
+        'two_hop_indptr': reach.indptr.astype(np.int64),
+        'two_hop_indices': reach.indices.astype(np.int32),
+    }
+
+
+# ----------------------------
+# CSR EXPORT
+# ----------------------------
+def save_graph(graph: dict, path=GRAPH_NPZ):
+    """One compressed .npz: CSR arrays, node and effect labels, hub table."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(
+        path,
+        drug_ids=np.asarray(graph['drug_ids']),
+        names=np.asarray(graph['names']),
+        indptr=graph['indptr'],
+        indices=graph['indices'],
+        effect=graph['effect'],
+        effects=np.asarray(graph['effects']),
+        severities=np.asarray(graph['severities']),
+        effect_facts=np.asarray(graph['effect_facts'], dtype=np.int64),
+        hub_rows=graph['hub_rows'],
+        two_hop_indptr=graph['two_hop_indptr'],
+        two_hop_indices=graph['two_hop_indices'],
+    )
+
+
+def load_graph(path=GRAPH_NPZ) -> dict:
+    with np.load(path) as data:
+        graph = {key: data[key] for key in data.files}
+    for key in ('drug_ids', 'names', 'effects', 'severities'):
+        graph[key] = graph[key].tolist()
+    graph['effect_facts'] = graph['effect_facts'].tolist()
+    return graph
+
+
+# ----------------------------
+# LOOKUPS
+# ----------------------------
+class GraphIndex:
+    """Neighbour and 2-hop lookups by drug ID over a built or loaded graph."""
+
+    def __init__(self, graph: dict):
+        self.graph = graph
+        self.row = {d: i for i, d in enumerate(graph['drug_ids'])}
+        self.hub = {int(r): k for k, r in enumerate(graph['hub_rows'])}
+
+    def _ids(self, rows) -> list:
+        ids = self.graph['drug_ids']
+        return [ids[r] for r in rows]
+
+    def _neighbour_rows(self, r: int) -> np.ndarray:
+        g = self.graph
+        return g['indices'][g['indptr'][r]:g['indptr'][r + 1]]
+
+    def neighbours(self, drug_id: str) -> list:
+        """[(partner_id, effect), ...] -- drugs that interact directly."""
+        r = self.row.get(drug_id)
+        if r is None:
+            return []
+        g = self.graph
+        start, end = g['indptr'][r], g['indptr'][r + 1]
+        return [(g['drug_ids'][j], g['effects'][e])
+                for j, e in zip(g['indices'][start:end], g['effect'][start:end])]
+
+    def two_hop(self, drug_id: str) -> list:
+        """
+        Drugs exactly two interactions away. A table lookup for hubs;
+        otherwise expanded from the CSR adjacency.
+        """
+        r = self.row.get(drug_id)
+        if r is None:
+            return []
+        k = self.hub.get(r)
+        if k is not None:
+            g = self.graph
+            return self._ids(g['two_hop_indices'][g['two_hop_indptr'][k]:g['two_hop_indptr'][k + 1]])
+        direct = self._neighbour_rows(r)
+        if not len(direct):
+            return []
+        reach = np.unique(np.concatenate([self._neighbour_rows(j) for j in direct]))
+        reach = np.setdiff1d(reach, np.append(direct, r), assume_unique=False)
+        return self._ids(reach)
+
+    def regimen_reach(self, drug_ids) -> dict:
+        """
+        What else a regimen could conflict with: partners of any of its
+        drugs ('direct') and drugs one partner further out ('indirect'),
+        both excluding the regimen itself.
+        """
+        regimen = set(drug_ids)
+        direct, indirect = set(), set()
+        for d in regimen:
+            direct.update(p for p, _ in self.neighbours(d))
+            indirect.update(self.two_hop(d))
+        direct -= regimen
+        indirect -= regimen | direct
+        return {'direct': sorted(direct), 'indirect': sorted(indirect)}
+
+
+# ----------------------------
+# ANALYTICS
+# ----------------------------
+def degree_distribution(deg: np.ndarray) -> dict:
+    """Summary statistics plus a log2-bucketed histogram."""
+    if not len(deg):
+        return {'histogram': []}
+    buckets = Counter(0 if d == 0 else int(d).bit_length() for d in deg)
+    histogram = []
+    for b in sorted(buckets):
+        lo, hi = (0, 0) if b == 0 else (1 << (b - 1), (1 << b) - 1)
+        histogram.append({'degree': f'{lo}' if lo == hi else f'{lo}-{hi}',
+                          'drugs': buckets[b]})
+
+    edges = deg.sum() / 2
+    top = np.sort(deg)[::-1][:max(1, len(deg) // 100)]
+    return {
+        'min': int(deg.min()),
+        'mean': round(float(deg.mean()), 2),
+        'median': float(np.median(deg)),
+        'p90': float(np.percentile(deg, 90)),
+        'p99': float(np.percentile(deg, 99)),
+        'max': int(deg.max()),
+        # endpoints held by the top 1% of drugs (an edge counts for each end)
+        'top1pct_endpoint_share': round(float(top.sum() / (2 * edges)), 4) if edges else 0.0,
+        'histogram': histogram,
+    }
+
+
+def effect_counts(graph: dict) -> list:
+    """Facts and (primary-effect) edges per effect, most edges first."""
+    edges = np.bincount(graph['effect'], minlength=len(graph['effects'])) // 2
+    rows = [
+        {
+            'effect': effect,
+            'severity': graph['severities'][code],
+            'facts': int(graph['effect_facts'][code]),
+            'edges': int(edges[code]),
+        }
+        for code, effect in enumerate(graph['effects'])
+    ]
+    rows.sort(key=lambda r: (-r['edges'], -r['facts'], r['effect']))
+    return rows
+
+
+def components(graph: dict, top: int = TOP_COMPONENTS) -> dict:
+    deg = degrees(graph)
+    count, labels = csgraph.connected_components(adjacency_matrix(graph), directed=False)
+    sizes = np.bincount(labels)
+    connected = np.sort(sizes[sizes > 1])[::-1]
+    return {
+        'components': int((sizes > 1).sum()),
+        'isolated_drugs': int((deg == 0).sum()),
+        'largest': int(connected[0]) if len(connected) else 0,
+        'largest_share': round(float(connected[0] / len(deg)), 4) if len(connected) else 0.0,
+        'top_sizes': connected[:top].tolist(),
+    }
+
+
+def hub_ranking(graph: dict) -> list:
+    """The precomputed hubs, highest degree first."""
+    deg = degrees(graph)
+    effect_weight = np.array([severity_weight(s or None) for s in graph['severities']] or [0])
+    two_hop_sizes = np.diff(graph['two_hop_indptr'])
+    hubs = []
+    for k, r in enumerate(graph['hub_rows']):
+        start, end = graph['indptr'][r], graph['indptr'][r + 1]
+        codes = graph['effect'][start:end]
+        top_effect = np.bincount(codes).argmax() if len(codes) else None
+        hubs.append({
+            'rank': k + 1,
+            'drug_id': graph['drug_ids'][r],
+            'name': graph['names'][r],
+            'degree': int(deg[r]),
+            'weighted_degree': int(effect_weight[codes].sum()) if len(codes) else 0,
+            'top_effect': graph['effects'][top_effect] if top_effect is not None else '',
+            'two_hop': int(two_hop_sizes[k]),
+        })
+    return hubs
+
+
+def graph_report(graph: dict) -> dict:
+    deg = degrees(graph)
+    return {
+        'drugs': len(graph['drug_ids']),
+        'edges': int(len(graph['indices']) // 2),
+        'facts': int(sum(graph['effect_facts'])),
+        'degree': degree_distribution(deg),
+        'effects': effect_counts(graph),
+        'connectivity': components(graph),
+        'hubs': hub_ranking(graph),
+    }
+
+
+def write_report(report: dict, path=REPORT_JSON):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+        f.write('\n')
+
+
+# ----------------------------
+# ENTRY POINT
+# ----------------------------
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export the interaction graph as CSR and report its structure."
+    )
+    parser.add_argument('--db', type=Path, default=OUTPUT_DB)
+    parser.add_argument('--graph', type=Path, default=GRAPH_NPZ)
+    parser.add_argument('-o', '--output', type=Path, default=REPORT_JSON)
+    parser.add_argument('--hubs', type=int, default=DEFAULT_HUBS,
+                        help="drugs whose 2-hop neighbourhood is precomputed")
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    store = KBStore(args.db)
+    t0 = time.perf_counter()
+    graph = build_graph(store, args.hubs)
+    t1 = time.perf_counter()
+    save_graph(graph, args.graph)
+    t2 = time.perf_counter()
+    report = graph_report(graph)
+    report['seconds'] = {
+        'build': round(t1 - t0, 3),
+        'export': round(t2 - t1, 3),
+        'analytics': round(time.perf_counter() - t2, 3),
+    }
+    write_report(report, args.output)
+
+    deg = report['degree']
+    conn = report['connectivity']
+    print(f"✅ {report['drugs']:,} drugs, {report['edges']:,} interacting pairs "
+          f"({report['facts']:,} facts) -> {args.graph} "
+          f"({args.graph.stat().st_size / 1e6:.1f} MB)")
+    if report['edges']:
+        print(f"Degree: median {deg['median']:.0f}, p99 {deg['p99']:.0f}, max {deg['max']:,}; "
+              f"top 1% of drugs hold {deg['top1pct_endpoint_share']:.0%} of edge endpoints")
+    print(f"Components: {conn['components']:,} (largest {conn['largest']:,} drugs), "
+          f"{conn['isolated_drugs']:,} drugs without interactions")
+    print(f"\nTop {args.top} hubs:")
+    for h in report['hubs'][:args.top]:
+        print(f"  {h['drug_id']}  {h['name'] or '?':<28}{h['degree']:>7,} partners"
+              f"{h['two_hop']:>8,} at 2 hops  [{h['top_effect']}]")
+    print(f"\n✅ Report written to {args.output} "
+          f"(build {report['seconds']['build']:.2f}s, analytics {report['seconds']['analytics']:.2f}s)")
+
+
+if __name__ == '__main__':
+    main()
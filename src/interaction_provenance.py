@@ -0,0 +1,191 @@
+import mmap
+import struct
+import zlib
+from array import array
+from functools import lru_cache
+from pathlib import Path
+
+# ----------------------------
+# PATH SETUP
+# ----------------------------
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+OUTPUT_PROV = PROJECT_ROOT / 'kb' / 'interactions.prov'
+
+# ----------------------------
+# FILE LAYOUT
+# ----------------------------
+#   MAGIC
+#   block 0 .. block N-1      zlib-compressed, sentences separated by \0
+#   block table               N+1 uint64 offsets (block i = [off[i], off[i+1]))
+#   index                     sorted (drug_a, drug_b, block, slot) records
+#   footer                    block table offset, N, index offset, record count
+#   MAGIC
+#
+# The index is kept as fixed-width binary records and binary-searched in
+# place, so opening the store costs no per-pair Python objects.
+MAGIC = b'MSPROV1\n'
+BLOCK_SIZE = 64 * 1024          # uncompressed bytes per block
+ID_WIDTH = 8                    # DrugBank IDs are 7 chars ('DB00001')
+
+RECORD = struct.Struct(f'<{ID_WIDTH}s{ID_WIDTH}sIH')
+KEY_WIDTH = 2 * ID_WIDTH
+FOOTER = struct.Struct('<QIQI')
+
+
+def encode_id(drug_id: str) -> bytes:
+    raw = drug_id.encode('ascii')
+    if len(raw) > ID_WIDTH:
+        raise ValueError(f"Drug ID too long for provenance index: {drug_id}")
+    return raw.ljust(ID_WIDTH, b'\0')
+
+
+def pair_key(drug_a: str, drug_b: str) -> bytes:
+    """Canonical (sorted) pair key, matching interaction/3 ordering."""
+    a, b = sorted([drug_a.upper(), drug_b.upper()])
+    return encode_id(a) + encode_id(b)
+
+
+# ----------------------------
+# WRITER
+# ----------------------------
+class ProvenanceWriter:
+    """
+    Stream interaction descriptions into a block-compressed side file.
+    Sentences are compressed as they arrive; only the small index
+    entries are held in memory until close().
+    """
+
+    def __init__(self, path=OUTPUT_PROV, block_size: int = BLOCK_SIZE):
+        self.path = Path(path)
+        self.block_size = block_size
+        self.f = open(self.path, 'wb')
+        self.f.write(MAGIC)
+        self.offsets = array('Q', [len(MAGIC)])
+        self.entries = []
+        self.pending = []
+        self.pending_bytes = 0
+
+    def add(self, drug_a: str, drug_b: str, description: str):
+        sentence = description.strip().replace('\0', ' ').encode('utf-8')
+        self.entries.append(
+            (pair_key(drug_a, drug_b), len(self.offsets) - 1, len(self.pending))
+        )
+        self.pending.append(sentence)
+        self.pending_bytes += len(sentence) + 1
+        if self.pending_bytes >= self.block_size:
+            self._flush_block()
+
+    def _flush_block(self):
+        if not self.pending:
+            return
+        self.f.write(zlib.compress(b'\0'.join(self.pending), 9))
+        self.offsets.append(self.f.tell())
+        self.pending = []
+        self.pending_bytes = 0
+
+    def close(self) -> int:
+        self._flush_block()
+
+        block_table_offset = self.f.tell()
+        self.f.write(self.offsets.tobytes())
+
+        index_offset = self.f.tell()
+        self.entries.sort()
+        last_key = None
+        count = 0
+        for key, block, slot in self.entries:
+            if key == last_key:
+                continue            # first description wins, like seen_pairs
+            last_key = key
+            self.f.write(RECORD.pack(key[:ID_WIDTH], key[ID_WIDTH:], block, slot))
+            count += 1
+
+        self.f.write(FOOTER.pack(
+            block_table_offset, len(self.offsets) - 1, index_offset, count
+        ))
+        self.f.write(MAGIC)
+        self.f.close()
+        self.entries = []
+        return count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.f.close()
+
+
+# ----------------------------
+# READER
+# ----------------------------
+class ProvenanceStore:
+    """
+    On-demand lookup of the DrugBank sentence behind an interaction/3 fact.
+    Only the block holding the requested sentence is decompressed;
+    recently used blocks are kept in an LRU cache.
+    """
+
+    def __init__(self, path=OUTPUT_PROV, cache_blocks: int = 32):
+        self.path = Path(path)
+        self.f = open(self.path, 'rb')
+        self.mm = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        tail = len(MAGIC) + FOOTER.size
+        if self.mm[:len(MAGIC)] != MAGIC or self.mm[-len(MAGIC):] != MAGIC:
+            raise ValueError(f"Not a provenance file: {self.path}")
+        block_table_offset, n_blocks, self.index_offset, self.count = \
+            FOOTER.unpack(self.mm[-tail:-len(MAGIC)])
+
+        self.offsets = array('Q')
+        self.offsets.frombytes(
+            self.mm[block_table_offset:block_table_offset + 8 * (n_blocks + 1)]
+        )
+        self._block = lru_cache(maxsize=cache_blocks)(self._read_block)
+
+    def close(self):
+        self.mm.close()
+        self.f.close()
+
+    def __len__(self):
+        return self.count
+
+    def _read_block(self, block: int) -> list:
+        raw = self.mm[self.offsets[block]:self.offsets[block + 1]]
+        return zlib.decompress(raw).split(b'\0')
+
+    def _find(self, key: bytes):
+        lo, hi = 0, self.count
+        size = RECORD.size
+        base = self.index_offset
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = base + mid * size
+            probe = self.mm[start:start + KEY_WIDTH]
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                return RECORD.unpack(self.mm[start:start + size])
+        return None
+
+    def lookup(self, drug_a: str, drug_b: str):
+        """
+        Return the original DrugBank description for the pair
+        (in either order), or None if it is not recorded.
+        """
+        try:
+            record = self._find(pair_key(drug_a, drug_b))
+        except (ValueError, UnicodeEncodeError):
+            return None
+        if record is None:
+            return None
+        _, _, block, slot = record
+        return self._block(block)[slot].decode('utf-8')
+
+    def cache_info(self):
+        return self._block.cache_info()
@@ -0,0 +1,66 @@
+import numpy as np
+
+from kb_store import KBStore
+
+# ----------------------------
+# SEVERITY WEIGHTS
+# ----------------------------
+# Same ordering as severity_to_confidence() in app.py
+# (major -> HIGH, moderate -> MED, minor -> LOW).
+SEVERITY_WEIGHTS = {'minor': 1, 'moderate': 2, 'major': 3}
+
+# interaction/3 effects without a severity/2 entry are treated like the
+# generic 'interaction' fallback (moderate), as the UI does for unknowns.
+DEFAULT_WEIGHT = SEVERITY_WEIGHTS['moderate']
+
+
+def severity_weight(severity) -> int:
+    return SEVERITY_WEIGHTS.get(severity, DEFAULT_WEIGHT)
+
+
+# ----------------------------
+# INTERACTION ADJACENCY
+# ----------------------------
+def interaction_table(store: KBStore, drug_index: dict) -> dict:
+    """
+    interaction/3 restricted to the regimen's drug columns, as sorted
+    upper-triangle pair keys (i * n + j, i < j) with one effect per pair.
+
+    A pair listed with several effects keeps its most severe one; each
+    effect's weight is implied by severity/2 (see severity_weight()).
+    """
+    n = len(drug_index)
+    effect_codes = {}
+    severities = {}
+    keys, weights, codes = [], [], []
+    for a, b, effect, severity in store.iter_interactions():
+        i, j = drug_index.get(a), drug_index.get(b)
+        if i is None or j is None or i == j:
+            continue
+        if i > j:
+            i, j = j, i
+        code = effect_codes.setdefault(effect, len(effect_codes))
+        severities[effect] = severity
+        keys.append(i * n + j)
+        weights.append(severity_weight(severity))
+        codes.append(code)
+
+    keys = np.asarray(keys, dtype=np.int64)
+    weights = np.asarray(weights, dtype=np.int8)
+    codes = np.asarray(codes, dtype=np.int32)
+
+    # heaviest effect first within each pair, then keep the first row per key
+    order = np.lexsort((-weights, keys))
+    keys, weights, codes = keys[order], weights[order], codes[order]
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = keys[1:] != keys[:-1]
+
+    effects = sorted(effect_codes, key=effect_codes.get)
+    return {
+        'n': n,
+        'keys': keys[first],
+        'weights': weights[first],
+        'codes': codes[first],
+        'effects': effects,
+        'severities': [severities[e] for e in effects],
+    }
@@ -0,0 +1,531 @@
+import hashlib
+import re
+import sqlite3
+from pathlib import Path
+
+# ----------------------------
+# PATH SETUP
+# ----------------------------
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+KB_DIR = PROJECT_ROOT / 'kb'
+OUTPUT_DB = KB_DIR / 'medsafe.db'
+
+# Fact files produced by the xml_to_*_pl converters.
+# Interactions default to the same file the Streamlit app consults.
+FACT_FILES = {
+    'drug': KB_DIR / 'drugs.pl',
+    'interaction': KB_DIR / 'drug_interactions.pl',
+    'contraindicated': KB_DIR / 'contraindications.pl',
+    'food_interaction': KB_DIR / 'food_interactions.pl',
+    'food_note': KB_DIR / 'food_notes.pl',
+    'drug_class': KB_DIR / 'classes.pl',
+    'severity': KB_DIR / 'rules.pl',
+}
+
+# ----------------------------
+# SCHEMA
+# ----------------------------
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS drugs (
+    id   TEXT PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS interactions (
+    drug_a TEXT NOT NULL,
+    drug_b TEXT NOT NULL,
+    effect TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS contraindications (
+    drug_id   TEXT NOT NULL,
+    condition TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS food_interactions (
+    drug_id TEXT NOT NULL,
+    food    TEXT NOT NULL,
+    effect  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS food_notes (
+    drug_id TEXT NOT NULL,
+    note    TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS classes (
+    drug_id    TEXT NOT NULL,
+    class_name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS severity (
+    effect   TEXT PRIMARY KEY,
+    severity TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS drug_profiles (
+    drug_id   TEXT PRIMARY KEY,
+    name      TEXT,
+    conditions TEXT NOT NULL,
+    foods     TEXT NOT NULL,
+    major     INTEGER NOT NULL,
+    moderate  INTEGER NOT NULL,
+    minor     INTEGER NOT NULL,
+    unmapped  INTEGER NOT NULL,
+    partners  INTEGER NOT NULL,
+    high_risk INTEGER NOT NULL,
+    safe      INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sources (
+    predicate TEXT PRIMARY KEY,
+    path      TEXT NOT NULL,
+    sha256    TEXT NOT NULL
+);
+"""
+
+# Per-drug risk profiles, derived from the fact tables after each load.
+#   conditions: 'cond;cond'          (contraindicated/2)
+#   foods:      'food:effect;...'    (food_interaction/3)
+#   major/moderate/minor/unmapped:   interaction/3 facts by severity/2
+#   partners:   distinct interacting drugs
+# The flags reproduce rules.pl exactly:
+#   high_risk_drug/1 = contraindicated and (a food risk or any interaction)
+#   safe_drug/1      = no unsafe_context/2 at all, which includes having
+#                      any drug_class/2 entry
+SQL_BUILD_PROFILES = """
+INSERT INTO drug_profiles
+WITH
+ids AS (
+    SELECT id AS drug_id FROM drugs
+    UNION SELECT drug_a FROM interactions
+    UNION SELECT drug_b FROM interactions
+    UNION SELECT drug_id FROM contraindications
+    UNION SELECT drug_id FROM food_interactions
+    UNION SELECT drug_id FROM classes
+),
+edges AS (
+    SELECT drug_a AS drug_id, drug_b AS other, effect FROM interactions
+    UNION ALL
+    SELECT drug_b, drug_a, effect FROM interactions
+),
+inter AS (
+    SELECT e.drug_id,
+           SUM(s.severity = 'major')    AS major,
+           SUM(s.severity = 'moderate') AS moderate,
+           SUM(s.severity = 'minor')    AS minor,
+           SUM(s.severity IS NULL)      AS unmapped,
+           COUNT(DISTINCT e.other)      AS partners
+    FROM edges AS e
+    LEFT JOIN severity AS s ON s.effect = e.effect
+    GROUP BY e.drug_id
+),
+conds AS (
+    SELECT drug_id, group_concat(condition, ';') AS conditions
+    FROM (SELECT DISTINCT drug_id, condition FROM contraindications
+          ORDER BY drug_id, condition)
+    GROUP BY drug_id
+),
+foods AS (
+    SELECT drug_id, group_concat(food || ':' || effect, ';') AS foods
+    FROM (SELECT DISTINCT drug_id, food, effect FROM food_interactions
+          ORDER BY drug_id, food, effect)
+    GROUP BY drug_id
+),
+classed AS (SELECT DISTINCT drug_id FROM classes)
+SELECT ids.drug_id,
+       d.name,
+       COALESCE(c.conditions, ''),
+       COALESCE(f.foods, ''),
+       COALESCE(i.major, 0),
+       COALESCE(i.moderate, 0),
+       COALESCE(i.minor, 0),
+       COALESCE(i.unmapped, 0),
+       COALESCE(i.partners, 0),
+       IFNULL(c.conditions IS NOT NULL
+              AND (f.foods IS NOT NULL OR COALESCE(i.partners, 0) > 0), 0),
+       IFNULL(c.conditions IS NULL AND f.foods IS NULL AND i.partners IS NULL
+              AND k.drug_id IS NULL, 0)
+FROM ids
+LEFT JOIN drugs AS d ON d.id = ids.drug_id
+LEFT JOIN inter AS i ON i.drug_id = ids.drug_id
+LEFT JOIN conds AS c ON c.drug_id = ids.drug_id
+LEFT JOIN foods AS f ON f.drug_id = ids.drug_id
+LEFT JOIN classed AS k ON k.drug_id = ids.drug_id
+"""
+
+# Indexes are created after the bulk load (cheaper than maintaining
+# them row by row). Interactions are indexed in both directions because
+# interaction/3 facts are stored in canonical (sorted) order only.
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_interactions_ab ON interactions (drug_a, drug_b);
+CREATE INDEX IF NOT EXISTS idx_interactions_ba ON interactions (drug_b, drug_a);
+CREATE INDEX IF NOT EXISTS idx_contraindications ON contraindications (drug_id, condition);
+CREATE INDEX IF NOT EXISTS idx_food_interactions ON food_interactions (drug_id, food);
+CREATE INDEX IF NOT EXISTS idx_food_notes ON food_notes (drug_id);
+CREATE INDEX IF NOT EXISTS idx_classes_drug ON classes (drug_id, class_name);
+CREATE INDEX IF NOT EXISTS idx_classes_class ON classes (class_name, drug_id);
+"""
+
+# predicate name -> (table, arity)
+TABLES = {
+    'drug': ('drugs', 2),
+    'interaction': ('interactions', 3),
+    'contraindicated': ('contraindications', 2),
+    'food_interaction': ('food_interactions', 3),
+    'food_note': ('food_notes', 2),
+    'drug_class': ('classes', 2),
+    'severity': ('severity', 2),
+}
+
+# ----------------------------
+# HELPERS
+# ----------------------------
+FACT_RE = re.compile(r"^([a-z_]+)\((.*)\)\.\s*(?:%.*)?$")
+ARG_RE = re.compile(r"'((?:[^']|'')*)'|([A-Za-z0-9_]+)")
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of a file's contents, read in 1 MiB blocks."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def parse_fact_args(args: str) -> tuple:
+    """
+    Split the argument text of a ground fact into plain strings.
+    Example: "'DB00001', bleeding_risk" -> ('DB00001', 'bleeding_risk')
+    Returns None if an argument is an unbound variable (i.e. not a fact).
+    """
+    values = []
+    for quoted, bare in ARG_RE.findall(args):
+        if bare and (bare[0].isupper() or bare[0] == '_'):
+            return None
+        values.append(bare or quoted.replace("''", "'"))
+    return tuple(values)
+
+
+def iter_facts(path: Path, predicate: str, arity: int):
+    """
+    Yield the arguments of every `predicate/arity` fact in a .pl file.
+    Rules, clause bodies, comments and other predicates are skipped.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            # Facts start in column 0; indented lines are rule bodies
+            m = FACT_RE.match(line.rstrip())
+            if not m or m.group(1) != predicate:
+                continue
+            args = parse_fact_args(m.group(2))
+            if args is not None and len(args) == arity:
+                yield args
+
+
+# ----------------------------
+# BULK LOADING
+# ----------------------------
+def connect(db_path=OUTPUT_DB) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def bulk_load(conn: sqlite3.Connection, facts: dict) -> dict:
+    """
+    Replace the contents of the KB tables with `facts`
+    ({predicate: iterable of argument tuples}) in a single transaction.
+    Returns the number of rows loaded per table.
+    """
+    counts = {}
+    with conn:
+        for predicate, rows in facts.items():
+            table, arity = TABLES[predicate]
+            placeholders = ', '.join('?' * arity)
+            conn.execute(f'DELETE FROM {table}')
+            cur = conn.executemany(
+                f'INSERT OR IGNORE INTO {table} VALUES ({placeholders})',
+                rows
+            )
+            counts[table] = cur.rowcount
+        conn.executescript(INDEXES)
+    conn.execute('ANALYZE')
+    return counts
+
+
+def build_profiles(conn: sqlite3.Connection) -> int:
+    """Rebuild drug_profiles from the loaded fact tables."""
+    with conn:
+        conn.execute('DELETE FROM drug_profiles')
+        cur = conn.execute(SQL_BUILD_PROFILES)
+    return cur.rowcount
+
+
+def record_sources(conn: sqlite3.Connection, digests: dict):
+    """Remember which fact files (and contents) the store was built from."""
+    with conn:
+        conn.execute('DELETE FROM sources')
+        conn.executemany(
+            'INSERT INTO sources VALUES (?, ?, ?)',
+            ((predicate, str(path), digest)
+             for predicate, (path, digest) in digests.items())
+        )
+
+
+def build_kb_store(db_path=OUTPUT_DB, fact_files=None) -> dict:
+    """
+    Load the generated .pl fact files into a single-file SQLite store.
+    """
+    fact_files = fact_files or FACT_FILES
+
+    facts = {}
+    digests = {}
+    for predicate, path in fact_files.items():
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(f"Fact file not found: {path}")
+        digests[predicate] = (path, file_digest(path))
+        facts[predicate] = iter_facts(path, predicate, TABLES[predicate][1])
+
+    conn = connect(db_path)
+    try:
+        counts = bulk_load(conn, facts)
+        counts['drug_profiles'] = build_profiles(conn)
+        record_sources(conn, digests)
+    finally:
+        conn.close()
+
+    for table, n in counts.items():
+        print(f"✅ Loaded {n} rows into {table}")
+    print(f"✅ KB store written to {db_path}")
+    return counts
+
+
+# ----------------------------
+# QUERY LAYER
+# ----------------------------
+# Prepared statements mirroring the rules.pl predicates used by the app.
+# sqlite3 caches compiled statements per SQL text, so keeping these as
+# constants means each one is parsed once per connection.
+SQL_DRUGS = 'SELECT id, name FROM drugs ORDER BY id'
+
+SQL_UNSAFE_FOR_CONDITION = (
+    'SELECT 1 FROM contraindications WHERE drug_id = ? AND condition = ? LIMIT 1'
+)
+SQL_CONDITIONS_FOR = (
+    'SELECT condition FROM contraindications WHERE drug_id = ? ORDER BY condition'
+)
+
+# drug_interaction_effect/3 is symmetric: look up both stored orders,
+# each served by its own index.
+SQL_INTERACTION_EFFECTS = """
+SELECT effect FROM interactions WHERE drug_a = ?1 AND drug_b = ?2
+UNION ALL
+SELECT effect FROM interactions WHERE drug_b = ?1 AND drug_a = ?2
+"""
+
+SQL_UNSAFE_CONTEXT = """
+SELECT DISTINCT s.severity
+FROM (
+    SELECT effect FROM interactions WHERE drug_a = ?1 AND drug_b = ?2
+    UNION ALL
+    SELECT effect FROM interactions WHERE drug_b = ?1 AND drug_a = ?2
+) AS i
+JOIN severity AS s ON s.effect = i.effect
+ORDER BY s.severity
+"""
+
+SQL_FOODS_FOR = """
+SELECT food, effect FROM food_interactions WHERE drug_id = ? ORDER BY food
+"""
+
+SQL_FOOD_NOTES = 'SELECT note FROM food_notes WHERE drug_id = ?'
+
+SQL_CLASSES_FOR = (
+    'SELECT class_name FROM classes WHERE drug_id = ? ORDER BY class_name'
+)
+SQL_DRUGS_IN_CLASS = (
+    'SELECT drug_id FROM classes WHERE class_name = ? ORDER BY drug_id'
+)
+SQL_SEVERITY = 'SELECT effect, severity FROM severity'
+
+SQL_SOURCES = 'SELECT predicate, sha256 FROM sources'
+
+SQL_PROFILE = 'SELECT * FROM drug_profiles WHERE drug_id = ?'
+SQL_ALL_PROFILES = 'SELECT * FROM drug_profiles'
+
+# Whole relations, for bulk (matrix) consumers.
+SQL_ALL_INTERACTIONS = """
+SELECT i.drug_a, i.drug_b, i.effect, s.severity
+FROM interactions AS i
+LEFT JOIN severity AS s ON s.effect = i.effect
+"""
+SQL_ALL_CONTRAINDICATIONS = 'SELECT drug_id, condition FROM contraindications'
+SQL_ALL_FOOD_INTERACTIONS = """
+SELECT f.drug_id, f.food, f.effect, s.severity
+FROM food_interactions AS f
+LEFT JOIN severity AS s ON s.effect = f.effect
+"""
+
+# Interactions inside a candidate set. The set goes into a TEMP table so
+# the join stays indexed regardless of how many IDs are passed.
+SQL_CREATE_SELECTED = 'CREATE TEMP TABLE IF NOT EXISTS selected (id TEXT PRIMARY KEY)'
+
+SQL_INTERACTIONS_AMONG = """
+SELECT i.drug_a, i.drug_b, i.effect, s.severity
+FROM interactions AS i
+JOIN selected AS x ON x.id = i.drug_a
+JOIN selected AS y ON y.id = i.drug_b
+LEFT JOIN severity AS s ON s.effect = i.effect
+"""
+
+
+def normalize_drug(raw: str) -> str:
+    """Same canonical form as normalize_drug/2 in rules.pl."""
+    return str(raw).upper()
+
+
+def profile_from_row(row) -> dict:
+    """A drug_profiles row as plain Python data."""
+    (drug_id, name, conditions, foods, major, moderate, minor, unmapped,
+     partners, high_risk, safe) = row
+    return {
+        'drug_id': drug_id,
+        'name': name,
+        'conditions': conditions.split(';') if conditions else [],
+        'foods': [tuple(f.split(':', 1)) for f in foods.split(';')] if foods else [],
+        'interactions': {
+            'major': major, 'moderate': moderate, 'minor': minor, 'unmapped': unmapped,
+        },
+        'partners': partners,
+        'high_risk': bool(high_risk),
+        'safe': bool(safe),
+    }
+
+
+class KBStore:
+    """
+    Read-only access to the SQLite KB, answering the same questions the
+    app asks through rules.pl.
+    """
+
+    def __init__(self, db_path=OUTPUT_DB):
+        db_path = Path(db_path)
+        if not db_path.exists():
+            raise FileNotFoundError(f"KB store not found: {db_path}")
+        self.conn = sqlite3.connect(
+            f'file:{db_path}?mode=ro', uri=True, check_same_thread=False
+        )
+
+    def close(self):
+        self.conn.close()
+
+    def drugs(self) -> list:
+        """drug(ID, Name) -> [(id, name), ...]"""
+        return self.conn.execute(SQL_DRUGS).fetchall()
+
+    def unsafe_for_condition(self, drug_id: str, condition: str) -> bool:
+        row = self.conn.execute(
+            SQL_UNSAFE_FOR_CONDITION, (normalize_drug(drug_id), condition)
+        ).fetchone()
+        return row is not None
+
+    def conditions_for(self, drug_id: str) -> list:
+        rows = self.conn.execute(SQL_CONDITIONS_FOR, (normalize_drug(drug_id),))
+        return [c for (c,) in rows]
+
+    def interaction_effects(self, drug_a: str, drug_b: str) -> list:
+        """explain_unsafe(A, drug(B), Reason) -> [effect, ...]"""
+        rows = self.conn.execute(
+            SQL_INTERACTION_EFFECTS,
+            (normalize_drug(drug_a), normalize_drug(drug_b))
+        )
+        return [e for (e,) in rows]
+
+    def unsafe_context(self, drug_a: str, drug_b: str) -> list:
+        """unsafe_context(A, drug(B), Severity) -> [severity, ...]"""
+        rows = self.conn.execute(
+            SQL_UNSAFE_CONTEXT,
+            (normalize_drug(drug_a), normalize_drug(drug_b))
+        )
+        return [s for (s,) in rows]
+
+    def unsafe_with_food(self, drug_id: str) -> list:
+        """food_interaction(Drug, Food, Effect) -> [(food, effect), ...]"""
+        return self.conn.execute(
+            SQL_FOODS_FOR, (normalize_drug(drug_id),)
+        ).fetchall()
+
+    def food_notes(self, drug_id: str) -> list:
+        rows = self.conn.execute(SQL_FOOD_NOTES, (normalize_drug(drug_id),))
+        return [n for (n,) in rows]
+
+    def classes_for(self, drug_id: str) -> list:
+        rows = self.conn.execute(SQL_CLASSES_FOR, (normalize_drug(drug_id),))
+        return [c for (c,) in rows]
+
+    def drugs_in_class(self, class_name: str) -> list:
+        rows = self.conn.execute(SQL_DRUGS_IN_CLASS, (class_name,))
+        return [d for (d,) in rows]
+
+    def severity_map(self) -> dict:
+        return dict(self.conn.execute(SQL_SEVERITY).fetchall())
+
+    def stale_sources(self, fact_files=None) -> list:
+        """
+        Predicates whose fact file is missing or has changed since the
+        store was built, i.e. where the store no longer matches what
+        rules.pl consults. A store built before sources were recorded
+        counts as stale throughout.
+        """
+        fact_files = fact_files or FACT_FILES
+        try:
+            built = dict(self.conn.execute(SQL_SOURCES).fetchall())
+        except sqlite3.OperationalError:
+            built = {}
+        stale = []
+        for predicate, path in fact_files.items():
+            path = Path(path)
+            if not path.exists() or built.get(predicate) != file_digest(path):
+                stale.append(predicate)
+        return stale
+
+    def profile(self, drug_id: str):
+        """Precomputed risk profile of one drug (see profile_from_row), or None."""
+        row = self.conn.execute(SQL_PROFILE, (normalize_drug(drug_id),)).fetchone()
+        return profile_from_row(row) if row else None
+
+    def profiles(self) -> dict:
+        """{drug_id: profile} for every drug, for in-memory O(1) lookups."""
+        return {
+            row[0]: profile_from_row(row)
+            for row in self.conn.execute(SQL_ALL_PROFILES)
+        }
+
+    def iter_interactions(self):
+        """Every interaction/3 fact as (drug_a, drug_b, effect, severity or None)."""
+        return self.conn.execute(SQL_ALL_INTERACTIONS)
+
+    def iter_contraindications(self):
+        """Every contraindicated/2 fact as (drug_id, condition)."""
+        return self.conn.execute(SQL_ALL_CONTRAINDICATIONS)
+
+    def iter_food_interactions(self):
+        """Every food_interaction/3 fact as (drug_id, food, effect, severity or None)."""
+        return self.conn.execute(SQL_ALL_FOOD_INTERACTIONS)
+
+    def interactions_among(self, drug_ids) -> list:
+        """
+        All interaction/3 facts whose two drugs are both in `drug_ids`:
+        [(drug_a, drug_b, effect, severity or None), ...]
+        """
+        with self.conn:
+            self.conn.execute(SQL_CREATE_SELECTED)
+            self.conn.execute('DELETE FROM selected')
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO selected VALUES (?)',
+                ((normalize_drug(d),) for d in drug_ids)
+            )
+        return self.conn.execute(SQL_INTERACTIONS_AMONG).fetchall()
+
+
+# ----------------------------
+# ENTRY POINT
+# ----------------------------
+if __name__ == '__main__':
+    build_kb_store()
@@ -0,0 +1,315 @@
+import argparse
+import csv
+import random
+import re
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from kb_store import FACT_FILES, iter_facts
+
+# ----------------------------
+# PATH SETUP
+# ----------------------------
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+ALIASES_PL = PROJECT_ROOT / 'kb' / 'drug_aliases.pl'
+DRUGS_PL = FACT_FILES['drug']
+
+# ----------------------------
+# CONFIG
+# ----------------------------
+# How much an exact hit on each kind of name is trusted. Product names
+# are the noisiest (combination products list every ingredient).
+KIND_CONFIDENCE = {
+    'id': 1.0,
+    'name': 1.0,
+    'synonym': 0.9,
+    'brand': 0.9,
+    'product': 0.85,
+}
+KIND_RANK = {kind: i for i, kind in enumerate(KIND_CONFIDENCE)}
+
+CACHE_SIZE = 65536
+
+DRUGBANK_ID_RE = re.compile(r'\bDB\d{5}\b', re.IGNORECASE)
+
+# Strengths ("200mg", "0.5 mg/ml", "ASA 81", "1:1000") are tokens that
+# start with a digit plus the unit words below; dose forms, routes and
+# sig words never identify the drug itself either.
+NOISE_WORDS = frozenset("""
+    tablet tablets tab tabs caplet caplets capsule capsules cap caps
+    softgel softgels gelcap gelcaps liqui gels gel chewable chew
+    oral po iv im sc subcut sl topical ophthalmic otic nasal rectal vaginal
+    solution soln suspension susp syrup elixir liquid drops drop
+    injection inj injectable infusion vial ampule
+    cream ointment lotion patch spray inhaler inhalation powder
+    er xr sr cr dr xl la ec ir odt
+    extended delayed modified immediate sustained controlled release
+    film coated enteric
+    daily bid tid qid qd qhs prn once twice
+    mg mcg ug g kg ml l iu unit units meq mmol actuation actuations dose doses
+""".split())
+
+# Salt forms: dropped unless nothing else is left ('sodium chloride').
+SALT_WORDS = frozenset("""
+    sodium potassium calcium magnesium
+    hydrochloride hcl hydrobromide hbr chloride bromide
+    sulfate sulphate bisulfate succinate tartrate bitartrate maleate
+    mesylate besylate citrate acetate phosphate fumarate
+    monohydrate dihydrate trihydrate anhydrous
+""".split())
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+# ----------------------------
+# NORMALIZATION
+# ----------------------------
+def normalize_text(text: str) -> tuple:
+    """
+    Lowercased word tokens with strengths, dose-form noise and salt
+    forms removed.
+    Example: 'Advil Liqui-Gels 200 mg' -> ('advil',)
+    """
+    tokens = tuple(
+        t for t in TOKEN_RE.findall(text.lower())
+        if t[0] > '9' and t not in NOISE_WORDS
+    )
+    return tuple(t for t in tokens if t not in SALT_WORDS) or tokens
+
+
+# ----------------------------
+# COMPILED MATCHER
+# ----------------------------
+def iter_aliases(aliases_pl=ALIASES_PL, drugs_pl=DRUGS_PL):
+    """(drug_id, text, kind) from drug/2 names and drug_alias/3 facts."""
+    if Path(drugs_pl).exists():
+        for drug_id, atom in iter_facts(drugs_pl, 'drug', 2):
+            yield drug_id, atom.replace('_', ' '), 'name'
+    if Path(aliases_pl).exists():
+        yield from iter_facts(aliases_pl, 'drug_alias', 3)
+
+
+class MedResolver:
+    """
+    Resolve free-text medication entries ('Advil 200mg', 'Coumadin',
+    'ASA 81') to DrugBank IDs.
+
+    Every alias is normalized once into a token tuple and stored in a
+    dict, so resolving a line is one regex pass plus hash lookups:
+      1. explicit DrugBank IDs in the text
+      2. the whole normalized entry as an alias
+      3. the longest alias found inside the entry (confidence scaled by
+         the share of tokens it covers)
+    """
+
+    def __init__(self, aliases=None, cache_size: int = CACHE_SIZE):
+        if aliases is None:
+            aliases = iter_aliases()
+
+        # key -> {drug_id: best kind}
+        by_key = {}
+        self.names = {}
+        for drug_id, text, kind in aliases:
+            if kind == 'name':
+                self.names.setdefault(drug_id, text)
+            key = normalize_text(text)
+            if not key:
+                continue
+            ids = by_key.setdefault(key, {})
+            prev = ids.get(drug_id)
+            if prev is None or KIND_RANK.get(kind, len(KIND_RANK)) < KIND_RANK.get(prev, len(KIND_RANK)):
+                ids[drug_id] = kind
+
+        # key -> (drug_id, kind, confidence, candidate ids)
+        self.table = {key: self._compile_entry(ids) for key, ids in by_key.items()}
+        self.max_tokens = max((len(k) for k in self.table), default=0)
+        self.resolve = lru_cache(maxsize=cache_size)(self._resolve)
+
+    @staticmethod
+    def _compile_entry(ids: dict) -> tuple:
+        ranked = sorted(ids.items(), key=lambda kv: (KIND_RANK.get(kv[1], len(KIND_RANK)), kv[0]))
+        drug_id, kind = ranked[0]
+        confidence = KIND_CONFIDENCE.get(kind, min(KIND_CONFIDENCE.values()))
+        # several drugs share the best kind (e.g. a combination product)
+        ties = [d for d, k in ranked if k == kind]
+        if len(ties) > 1:
+            confidence /= len(ties)
+        return drug_id, kind, confidence, tuple(d for d, _ in ranked)
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def _resolve(self, text: str) -> dict:
+        """
+        {'input', 'drug_id', 'name', 'matched', 'kind', 'confidence',
+         'candidates'}; drug_id is None when nothing matched.
+        """
+        ids = DRUGBANK_ID_RE.findall(text) if 'db' in text.lower() else None
+        if ids:
+            drug_id = ids[0].upper()
+            return self._result(text, drug_id, drug_id, 'id', 1.0, tuple(i.upper() for i in ids))
+
+        tokens = normalize_text(text)
+        hit = self.table.get(tokens)
+        if hit is not None:
+            drug_id, kind, confidence, candidates = hit
+            return self._result(text, drug_id, ' '.join(tokens), kind, confidence, candidates)
+
+        # longest alias inside the entry, leftmost first
+        for size in range(min(self.max_tokens, len(tokens) - 1), 0, -1):
+            for start in range(len(tokens) - size + 1):
+                span = tokens[start:start + size]
+                hit = self.table.get(span)
+                if hit is not None:
+                    drug_id, kind, confidence, candidates = hit
+                    return self._result(text, drug_id, ' '.join(span), kind,
+                                        confidence * size / len(tokens), candidates)
+
+        return self._result(text, None, '', None, 0.0, ())
+
+    def _result(self, text, drug_id, matched, kind, confidence, candidates) -> dict:
+        return {
+            'input': text,
+            'drug_id': drug_id,
+            'name': self.names.get(drug_id, '') if drug_id else '',
+            'matched': matched,
+            'kind': kind,
+            'confidence': round(confidence, 3),
+            'candidates': candidates,
+        }
+
+    def resolve_lines(self, lines):
+        """Resolve an iterable of entries, skipping blank lines."""
+        for line in lines:
+            line = line.strip()
+            if line:
+                yield self.resolve(line)
+
+
+# ----------------------------
+# BATCH
+# ----------------------------
+def resolve_file(resolver: MedResolver, input_path, output_path,
+                 min_confidence: float = 0.0) -> dict:
+    """
+    Resolve one entry per line of `input_path` into a CSV. Entries below
+    `min_confidence` are reported as unresolved.
+    """
+    resolved = 0
+    unresolved = []
+    t0 = time.perf_counter()
+
+    with open(input_path, 'r', encoding='utf-8') as f_in, \
+         open(output_path, 'w', encoding='utf-8', newline='') as f_out:
+        writer = csv.writer(f_out)
+        writer.writerow(['input', 'drug_id', 'name', 'matched', 'kind',
+                         'confidence', 'candidates'])
+        for r in resolver.resolve_lines(f_in):
+            ok = r['drug_id'] is not None and r['confidence'] >= min_confidence
+            if ok:
+                resolved += 1
+            else:
+                unresolved.append(r['input'])
+            writer.writerow([
+                r['input'], r['drug_id'] if ok else '', r['name'] if ok else '',
+                r['matched'], r['kind'] or '', r['confidence'],
+                ';'.join(r['candidates']),
+            ])
+
+    elapsed = time.perf_counter() - t0
+    total = resolved + len(unresolved)
+    return {
+        'lines': total,
+        'resolved': resolved,
+        'unresolved': unresolved,
+        'seconds': elapsed,
+        'lines_per_s': total / elapsed if elapsed else 0.0,
+    }
+
+
+# ----------------------------
+# BENCHMARK
+# ----------------------------
+def synthetic_lines(resolver: MedResolver, n: int, seed: int = 0) -> list:
+    """Alias text decorated with strengths and dose forms, plus misses."""
+    rng = random.Random(seed)
+    keys = [' '.join(k) for k in resolver.table]
+    strengths = ['', ' 5mg', ' 200 mg', ' 81', ' 0.5 mg/ml', ' 10mg/5ml', ' 1 g']
+    forms = ['', ' tablet', ' tabs', ' ER', ' oral solution', ' capsules', ' po daily']
+    lines = []
+    for _ in range(n):
+        if rng.random() < 0.05:
+            lines.append(f"unknown med {rng.randrange(10 ** 6)}")
+            continue
+        name = rng.choice(keys)
+        name = name.title() if rng.random() < 0.5 else name.upper()
+        lines.append(name + rng.choice(strengths) + rng.choice(forms))
+    return lines
+
+
+def bench(resolver: MedResolver, n: int = 200_000):
+    lines = synthetic_lines(resolver, n)
+    distinct = len(set(lines))
+
+    resolver.resolve.cache_clear()
+    t0 = time.perf_counter()
+    for line in lines:
+        resolver._resolve(line)
+    uncached = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    results = list(resolver.resolve_lines(lines))
+    cached = time.perf_counter() - t0
+
+    misses = sum(r['drug_id'] is None for r in results)
+    print(f"{n:,} lines ({distinct:,} distinct), {len(resolver):,} compiled aliases")
+    print(f"  uncached: {n / uncached:,.0f} lines/s   "
+          f"with line cache: {n / cached:,.0f} lines/s   unresolved: {misses:,}")
+
+
+# ----------------------------
+# ENTRY POINT
+# ----------------------------
+def main():
+    parser = argparse.ArgumentParser(
+        description="Resolve free-text medication lists to DrugBank IDs."
+    )
+    parser.add_argument('input', type=Path, nargs='?',
+                        help="text file, one medication entry per line")
+    parser.add_argument('-o', '--output', type=Path,
+                        help="CSV output (default: <input>.resolved.csv)")
+    parser.add_argument('--min-confidence', type=float, default=0.5)
+    parser.add_argument('--aliases', type=Path, default=ALIASES_PL)
+    parser.add_argument('--bench', type=int, nargs='?', const=200_000, metavar='N',
+                        help="time N synthetic lines (default 200,000)")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    resolver = MedResolver(iter_aliases(args.aliases))
+    print(f"Compiled {len(resolver):,} aliases in {time.perf_counter() - t0:.2f}s")
+    if not args.aliases.exists():
+        print(f"⚠️ {args.aliases} not found (run xml_to_aliases_pl.py); "
+              f"matching canonical drug names only")
+
+    if args.bench is not None:
+        bench(resolver, args.bench)
+        return
+    if args.input is None:
+        parser.error("an input file is required (or use --bench)")
+
+    output = args.output or args.input.with_suffix('.resolved.csv')
+    report = resolve_file(resolver, args.input, output, args.min_confidence)
+    print(f"Resolved {report['resolved']:,} of {report['lines']:,} entries "
+          f"({report['lines_per_s']:,.0f} lines/s) -> {output}")
+    if report['unresolved']:
+        print(f"Unresolved ({len(report['unresolved'])}):")
+        for text in report['unresolved'][:20]:
+            print(f"  {text}")
+        if len(report['unresolved']) > 20:
+            print(f"  ... and {len(report['unresolved']) - 20} more (see {output})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+import argparse
+import csv
+import time
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+from kb_encoding import interaction_table
+from kb_store import OUTPUT_DB, KBStore
+from regimens import read_regimens, synthetic_regimens
+
+# ----------------------------
+# PATH SETUP
+# ----------------------------
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+REPORT_DIR = PROJECT_ROOT / 'reports'
+PAIRS_CSV = REPORT_DIR / 'interaction_prevalence.csv'
+EFFECTS_CSV = REPORT_DIR / 'interaction_effects.csv'
+
+RANK_BY = ('patients', 'weighted')
+
+
+# ----------------------------
+# INTERACTION ADJACENCY
+# ----------------------------
+def adjacency_mask(table: dict) -> sparse.csr_matrix:
+    n = table['n']
+    rows, cols = np.divmod(table['keys'], n)
+    return sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int8), (rows, cols)), shape=(n, n)
+    )
+
+
+# ----------------------------
+# PREVALENCE
+# ----------------------------
+def interaction_prevalence(X: sparse.csr_matrix, table: dict) -> dict:
+    """
+    Count patients exposed to each interacting pair.
+
+    C = X^T X counts co-prescriptions for every drug pair at once (one
+    sparse product, no per-patient work); masking its upper triangle with
+    the interaction adjacency leaves only the pairs that matter.
+
+    Returns parallel arrays sorted by pair key:
+      {'a', 'b', 'patients', 'weights', 'codes'}
+    """
+    C = sparse.triu(X.T @ X, k=1, format='csr')
+    hits = C.multiply(adjacency_mask(table)).tocoo()
+
+    n = table['n']
+    hit_keys = hits.row.astype(np.int64) * n + hits.col
+    order = np.argsort(hit_keys)
+    hit_keys = hit_keys[order]
+    idx = np.searchsorted(table['keys'], hit_keys)
+
+    return {
+        'a': hits.row[order],
+        'b': hits.col[order],
+        'patients': hits.data[order].astype(np.int64),
+        'weights': table['weights'][idx],
+        'codes': table['codes'][idx],
+    }
+
+
+def effect_summary(prev: dict, table: dict) -> list:
+    """Pairs, patient exposures and weighted exposures per effect category."""
+    n_effects = len(table['effects'])
+    pairs = np.bincount(prev['codes'], minlength=n_effects)
+    patients = np.bincount(prev['codes'], weights=prev['patients'], minlength=n_effects)
+    weighted = np.bincount(prev['codes'], weights=prev['patients'] * prev['weights'],
+                           minlength=n_effects)
+    rows = [
+        {
+            'effect': effect,
+            'severity': table['severities'][code] or '',
+            'pairs': int(pairs[code]),
+            'patients': int(patients[code]),
+            'weighted': int(weighted[code]),
+        }
+        for code, effect in enumerate(table['effects'])
+        if pairs[code]
+    ]
+    rows.sort(key=lambda r: (-r['weighted'], -r['patients'], r['effect']))
+    return rows
+
+
+def ranked_pairs(prev: dict, rank_by: str = 'patients', top: int = None):
+    """Indices into `prev`, most prevalent (or most weighted) first."""
+    if rank_by not in RANK_BY:
+        raise ValueError(f"Unknown ranking: {rank_by}")
+    patients = prev['patients']
+    weighted = patients * prev['weights']
+    primary, secondary = (patients, weighted) if rank_by == 'patients' else (weighted, patients)
+    order = np.lexsort((-secondary, -primary))
+    return order if top is None else order[:top]
+
+
+# ----------------------------
+# REPORT
+# ----------------------------
+def write_report(prev: dict, table: dict, drug_ids: list, names: dict,
+                 rank_by: str = 'patients',
+                 pairs_csv=PAIRS_CSV, effects_csv=EFFECTS_CSV) -> list:
+    Path(pairs_csv).parent.mkdir(parents=True, exist_ok=True)
+
+    with open(pairs_csv, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['drug_a', 'name_a', 'drug_b', 'name_b', 'effect',
+                         'severity', 'patients', 'weighted'])
+        for k in ranked_pairs(prev, rank_by):
+            a, b = drug_ids[prev['a'][k]], drug_ids[prev['b'][k]]
+            code = prev['codes'][k]
+            patients = int(prev['patients'][k])
+            writer.writerow([
+                a, names.get(a, ''), b, names.get(b, ''),
+                table['effects'][code], table['severities'][code] or '',
+                patients, patients * int(prev['weights'][k]),
+            ])
+
+    summary = effect_summary(prev, table)
+    with open(effects_csv, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(
+            f, fieldnames=['effect', 'severity', 'pairs', 'patients', 'weighted']
+        )
+        writer.writeheader()
+        writer.writerows(summary)
+    return summary
+
+
+def build_report(store: KBStore, regimen_path, rank_by: str = 'patients',
+                 top: int = 20, pairs_csv=PAIRS_CSV, effects_csv=EFFECTS_CSV):
+    t0 = time.perf_counter()
+    names = dict(store.drugs())
+    regimens = read_regimens(regimen_path)
+    X = regimens['X']
+    t_read = time.perf_counter()
+
+    drug_index = {d: i for i, d in enumerate(regimens['drug_ids'])}
+    table = interaction_table(store, drug_index)
+    prev = interaction_prevalence(X, table)
+    t_compute = time.perf_counter()
+
+    summary = write_report(prev, table, regimens['drug_ids'], names, rank_by,
+                           pairs_csv, effects_csv)
+
+    print(f"Patients: {X.shape[0]:,}, drugs: {X.shape[1]:,}, "
+          f"prescriptions: {X.nnz:,} (read in {t_read - t0:.2f}s)")
+    print(f"Interacting pairs seen: {len(prev['patients']):,} of "
+          f"{len(table['keys']):,} known among these drugs "
+          f"(computed in {t_compute - t_read:.2f}s)")
+
+    print(f"\nTop {top} pairs by {rank_by}:")
+    drug_ids = regimens['drug_ids']
+    for k in ranked_pairs(prev, rank_by, top):
+        a, b = drug_ids[prev['a'][k]], drug_ids[prev['b'][k]]
+        code = prev['codes'][k]
+        print(f"  {int(prev['patients'][k]):>9,}  {names.get(a, a)} + {names.get(b, b)}"
+              f"  [{table['effects'][code]}, {table['severities'][code] or 'unmapped'}]")
+
+    print("\nEffect categories:")
+    for r in summary:
+        print(f"  {r['effect']:<32}{r['severity'] or 'unmapped':<10}"
+              f"{r['pairs']:>8,} pairs{r['patients']:>12,} patients")
+
+    print(f"\nWrote {pairs_csv} and {effects_csv}")
+
+
+# ----------------------------
+# BENCHMARK
+# ----------------------------
+def bench(store: KBStore, n_patients: int = 1_000_000, mean_drugs: float = 5.0):
+    """Time the matrix path on a synthetic cohort over the KB's interacting drugs."""
+    drug_ids = sorted({d for a, b, _, _ in store.iter_interactions() for d in (a, b)})
+    drug_index = {d: i for i, d in enumerate(drug_ids)}
+
+    t0 = time.perf_counter()
+    table = interaction_table(store, drug_index)
+    t1 = time.perf_counter()
+    X = synthetic_regimens(n_patients, len(drug_ids), mean_drugs)['X']
+    t2 = time.perf_counter()
+    prev = interaction_prevalence(X, table)
+    t3 = time.perf_counter()
+    effect_summary(prev, table)
+    t4 = time.perf_counter()
+
+    print(f"{n_patients:,} patients x {len(drug_ids):,} drugs "
+          f"({X.nnz:,} prescriptions, {len(table['keys']):,} interacting pairs)")
+    print(f"  adjacency: {t1 - t0:.2f}s   synthetic cohort: {t2 - t1:.2f}s   "
+          f"X^T X + mask: {t3 - t2:.2f}s   summary: {t4 - t3:.3f}s")
+    print(f"  {len(prev['patients']):,} interacting pairs co-prescribed, "
+          f"{int(prev['patients'].sum()):,} patient exposures")
+
+
+# ----------------------------
+# ENTRY POINT
+# ----------------------------
+def main():
+    parser = argparse.ArgumentParser(
+        description="Population-level prevalence of known drug interactions."
+    )
+    parser.add_argument('regimens', type=Path, nargs='?',
+                        help="CSV of patient_id,drugs[,conditions]")
+    parser.add_argument('--db', type=Path, default=OUTPUT_DB)
+    parser.add_argument('--rank-by', choices=RANK_BY, default='patients')
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--pairs-out', type=Path, default=PAIRS_CSV)
+    parser.add_argument('--effects-out', type=Path, default=EFFECTS_CSV)
+    parser.add_argument('--bench', type=int, nargs='*', metavar='N',
+                        help="time a synthetic cohort of N patients (default 1,000,000)")
+    args = parser.parse_args()
+
+    store = KBStore(args.db)
+    if args.bench is not None:
+        for n in args.bench or [1_000_000]:
+            bench(store, n)
+        return
+
+    if args.regimens is None:
+        parser.error("a regimen file is required (or use --bench)")
+    build_report(store, args.regimens, args.rank_by, args.top,
+                 args.pairs_out, args.effects_out)
+
+
+if __name__ == '__main__':
+    main()
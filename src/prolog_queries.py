@@ -0,0 +1,415 @@
+import re
+import threading
+from collections import Counter
+from ctypes import byref, c_char_p, c_double, c_long
+
+from pyswip.core import (
+    CVT_ATOM,
+    CVT_STRING,
+    CVT_WRITE,
+    PL_ATOM,
+    PL_FLOAT,
+    PL_INTEGER,
+    PL_Q_CATCH_EXCEPTION,
+    PL_Q_NODEBUG,
+    PL_STRINGS_MARK,
+    REP_UTF8,
+    PL_copy_term_ref,
+    PL_cut_query,
+    PL_discard_foreign_frame,
+    PL_exception,
+    PL_get_arg,
+    PL_get_chars,
+    PL_get_float,
+    PL_get_list,
+    PL_get_long,
+    PL_new_term_ref,
+    PL_new_term_refs,
+    PL_next_solution,
+    PL_open_foreign_frame,
+    PL_open_query,
+    PL_predicate,
+    PL_put_chars,
+    PL_put_integer,
+    PL_put_variable,
+    PL_term_type,
+)
+from pyswip.easy import getTerm
+from pyswip.prolog import NestedQueryError, Prolog, PrologError
+
+# ----------------------------
+# CONFIG
+# ----------------------------
+# Helper predicates are asserted into `user` as '$medsafe_q_<name>'/N,
+# with a budgeted twin '$medsafe_qb_<name>' taking the inputs plus
+# (Millis, Inferences, Max, Rows, Status).
+HELPER_PREFIX = '$medsafe_q_'
+BOUNDED_PREFIX = '$medsafe_qb_'
+
+# Default per-query budgets (0 = unlimited); see set_default_budget().
+DEFAULT_TIME_LIMIT_S = 2.0
+DEFAULT_INFERENCE_LIMIT = 5_000_000
+
+STATUS_COMPLETE = 'complete'
+STATUS_TIME_LIMIT = 'time_limit'
+STATUS_INFERENCE_LIMIT = 'inference_limit'
+# Set by callers when the query raised (e.g. NestedQueryError) and
+# returned no usable rows at all.
+STATUS_ERROR = 'error'
+
+# Runs Goal under the wall-clock / inference budgets, collecting up to
+# Max instances of Template (-1 = all) in a non-backtrackable
+# accumulator, so solutions found before a budget runs out survive.
+BUDGET_CLAUSES = [
+    """'$medsafe_bounded'(Template, Goal, Millis, Inferences, Max, Rows, Status) :-
+        State = rows([], 0),
+        Collect = (  Goal,
+                     arg(1, State, R0), nb_setarg(1, State, [Template|R0]),
+                     arg(2, State, N0), N is N0 + 1, nb_setarg(2, State, N),
+                     N =:= Max
+                  -> true
+                  ;  true
+                  ),
+        catch('$medsafe_budget'(Collect, Millis, Inferences, Status),
+              time_limit_exceeded,
+              Status = time_limit),
+        arg(1, State, Rev),
+        reverse(Rev, Rows)""",
+    """'$medsafe_budget'(Goal, Millis, Inferences, Status) :-
+        (   Inferences > 0
+        ->  Limited = call_with_inference_limit(Goal, Inferences, Result)
+        ;   Limited = (call(Goal), Result = true)
+        ),
+        (   Millis > 0
+        ->  Seconds is Millis / 1000,
+            call_with_time_limit(Seconds, Limited)
+        ;   call(Limited)
+        ),
+        (   Result == inference_limit_exceeded
+        ->  Status = inference_limit
+        ;   Status = complete
+        )""",
+]
+
+# Extra arguments of the budgeted twin; prefixed so they cannot clash
+# with variables of the wrapped goal.
+BOUNDED_VARS = ('QB_Millis', 'QB_Inferences', 'QB_Max', 'QB_Rows', 'QB_Status')
+
+VAR_RE = re.compile(r'^[A-Z_][A-Za-z0-9_]*$')
+
+TEXT_FLAGS = CVT_ATOM | CVT_STRING | CVT_WRITE | REP_UTF8
+
+# pyswip tracks one open query per process (Prolog._queryIsOpen), so
+# calls from different threads (Streamlit sessions, the cache warm-up)
+# take turns on the engine instead of failing with NestedQueryError.
+# Re-entrant: a query nested in the same thread still raises.
+ENGINE_LOCK = threading.RLock()
+
+
+def set_default_budget(time_limit_s: float = None, inference_limit: int = None):
+    """Budgets for queries prepared without their own (0 = unlimited)."""
+    global DEFAULT_TIME_LIMIT_S, DEFAULT_INFERENCE_LIMIT
+    if time_limit_s is not None:
+        DEFAULT_TIME_LIMIT_S = time_limit_s
+    if inference_limit is not None:
+        DEFAULT_INFERENCE_LIMIT = inference_limit
+
+
+def install_budget_helpers(prolog: Prolog):
+    """Assert '$medsafe_bounded'/7 and its helper (idempotent)."""
+    prolog.dynamic("'$medsafe_bounded'/7", "'$medsafe_budget'/4")
+    prolog.retractall("'$medsafe_bounded'(_, _, _, _, _, _, _)")
+    prolog.retractall("'$medsafe_budget'(_, _, _, _)")
+    for clause in BUDGET_CLAUSES:
+        prolog.assertz(clause)
+
+
+# ----------------------------
+# RESULTS & COUNTERS
+# ----------------------------
+class QueryResult(list):
+    """
+    Solutions of one query, plus how it ended. `status` is 'complete',
+    or 'time_limit' / 'inference_limit' when a budget cut it short; the
+    rows are then the solutions found before the cut (possibly none).
+    'error' means the query raised and the rows are not an answer.
+    """
+
+    def __init__(self, rows=(), status: str = STATUS_COMPLETE):
+        super().__init__(rows)
+        self.status = status
+
+    @property
+    def complete(self) -> bool:
+        return self.status == STATUS_COMPLETE
+
+
+class BudgetStats:
+    """Thread-safe per-query counts of runs and budget hits."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def record(self, name: str, status: str):
+        with self._lock:
+            self._counts.setdefault(name, Counter())[status] += 1
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            by_query = {name: dict(c) for name, c in self._counts.items()}
+        total = Counter()
+        for c in by_query.values():
+            total.update(c)
+        return {
+            'queries': sum(total.values()),
+            'time_limit': total[STATUS_TIME_LIMIT],
+            'inference_limit': total[STATUS_INFERENCE_LIMIT],
+            'errors': total[STATUS_ERROR],
+            'by_query': by_query,
+        }
+
+
+budget_stats = BudgetStats()
+
+
+# ----------------------------
+# TERM CONVERSION
+# ----------------------------
+def to_python(term):
+    """
+    Plain Python value of a bound output: int / float for numbers, str
+    for atoms and strings, and the written form for anything else.
+    """
+    kind = PL_term_type(term)
+    if kind == PL_INTEGER:
+        i = c_long()
+        if PL_get_long(term, byref(i)):
+            return i.value
+    elif kind == PL_FLOAT:
+        d = c_double()
+        if PL_get_float(term, byref(d)):
+            return d.value
+    s = c_char_p()
+    if PL_get_chars(term, byref(s), TEXT_FLAGS):
+        return s.value.decode('utf-8')
+    return str(getTerm(term))
+
+
+# ----------------------------
+# PREPARED QUERY
+# ----------------------------
+class PreparedQuery:
+    """
+    A goal compiled once and called with atoms bound directly.
+
+        pair = PreparedQuery(prolog, 'pair_severity',
+                             "unsafe_context(Drug, drug(Other), Severity)",
+                             inputs=('Drug', 'Other'), outputs=('Severity',))
+        pair('DB00682', 'DB00945')   # -> [{'Severity': 'major'}, ...]
+
+    The goal text is parsed a single time, as the body of a helper clause
+    '$medsafe_q_<name>'(Inputs..., Outputs...). Each call then builds the
+    argument vector with PL_put_chars (no quoting, no parsing) and
+    runs the helper through PL_open_query.
+
+    Calls are bounded by a wall-clock and an inference budget
+    (time_limit / inference_limit; None = module default, 0 = unlimited).
+    Every call returns a QueryResult whose status says whether a budget
+    was hit.
+    """
+
+    def __init__(self, prolog: Prolog, name: str, goal: str,
+                 inputs=(), outputs=(), time_limit: float = None,
+                 inference_limit: int = None):
+        for var in (*inputs, *outputs):
+            if not VAR_RE.match(var) or var in BOUNDED_VARS:
+                raise ValueError(f"Not a Prolog variable name: {var!r}")
+        self.name = name
+        self.goal = goal
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.arity = len(self.inputs) + len(self.outputs)
+        self.functor = HELPER_PREFIX + name
+        self.bounded_functor = BOUNDED_PREFIX + name
+        self.time_limit = time_limit
+        self.inference_limit = inference_limit
+
+        params = self.inputs + self.outputs
+        head = f"'{self.functor}'({', '.join(params)})" if params else f"'{self.functor}'"
+        template = f"row({', '.join(self.outputs)})" if self.outputs else "row"
+        bounded_params = ', '.join(self.inputs + BOUNDED_VARS)
+        bounded_head = f"'{self.bounded_functor}'({bounded_params})"
+
+        # idempotent: Streamlit reruns and reloads may prepare twice
+        prolog.dynamic(f"'{self.functor}'/{self.arity}",
+                       f"'{self.bounded_functor}'/{len(self.inputs) + 5}")
+        prolog.retractall(head)
+        prolog.assertz(f"({head} :- {goal})")
+        prolog.retractall(bounded_head)
+        prolog.assertz(f"({bounded_head} :- '$medsafe_bounded'({template}, {head}, "
+                       f"{', '.join(BOUNDED_VARS)}))")
+        self._predicate = None
+        self._bounded_predicate = None
+
+    def _handle(self):
+        if self._predicate is None:
+            self._predicate = PL_predicate(self.functor, self.arity, None)
+        return self._predicate
+
+    def _bounded_handle(self):
+        if self._bounded_predicate is None:
+            self._bounded_predicate = PL_predicate(
+                self.bounded_functor, len(self.inputs) + 5, None
+            )
+        return self._bounded_predicate
+
+    def budget(self, time_limit: float = None, inference_limit: int = None) -> tuple:
+        """Effective (seconds, inferences) for one call."""
+        for value in (time_limit, self.time_limit, DEFAULT_TIME_LIMIT_S):
+            if value is not None:
+                time_limit = value
+                break
+        for value in (inference_limit, self.inference_limit, DEFAULT_INFERENCE_LIMIT):
+            if value is not None:
+                inference_limit = value
+                break
+        return time_limit, inference_limit
+
+    def run(self, *args, maxresult: int = -1, time_limit: float = None,
+            inference_limit: int = None) -> QueryResult:
+        """All (or the first `maxresult`) solutions as dicts of outputs."""
+        if len(args) != len(self.inputs):
+            raise TypeError(
+                f"{self.name} expects {len(self.inputs)} arguments, got {len(args)}"
+            )
+        with ENGINE_LOCK:
+            return self._run(args, maxresult, time_limit, inference_limit)
+
+    __call__ = run
+
+    def _run(self, args, maxresult, time_limit, inference_limit) -> QueryResult:
+        if Prolog._queryIsOpen:
+            raise NestedQueryError("The last query was not closed")
+
+        seconds, inferences = self.budget(time_limit, inference_limit)
+        bounded = seconds > 0 or inferences > 0
+
+        Prolog._init_prolog_thread()
+        fid = PL_open_foreign_frame()
+        qid = None
+        Prolog._queryIsOpen = True
+        try:
+            n_args = len(self.inputs) + (5 if bounded else len(self.outputs))
+            refs = PL_new_term_refs(n_args) if n_args else 0
+            for i, value in enumerate(args):
+                text = str(value).encode('utf-8')
+                PL_put_chars(refs + i, PL_ATOM | REP_UTF8, len(text), text)
+            first_out = len(self.inputs)
+
+            if bounded:
+                PL_put_integer(refs + first_out, int(seconds * 1000))
+                PL_put_integer(refs + first_out + 1, int(inferences))
+                PL_put_integer(refs + first_out + 2, maxresult)
+                PL_put_variable(refs + first_out + 3)
+                PL_put_variable(refs + first_out + 4)
+                handle = self._bounded_handle()
+            else:
+                for i in range(first_out, n_args):
+                    PL_put_variable(refs + i)
+                handle = self._handle()
+
+            qid = PL_open_query(None, PL_Q_NODEBUG | PL_Q_CATCH_EXCEPTION, handle, refs)
+            if bounded:
+                result = self._read_bounded(qid, refs + first_out + 3)
+            else:
+                result = QueryResult()
+                while maxresult and PL_next_solution(qid):
+                    maxresult -= 1
+                    with PL_STRINGS_MARK():
+                        result.append({
+                            var: to_python(refs + first_out + i)
+                            for i, var in enumerate(self.outputs)
+                        })
+
+            exc = PL_exception(qid)
+            if exc:
+                raise PrologError(
+                    f"Caused by: '{self.goal}' with {args!r}. "
+                    f"Returned: '{getTerm(exc)}'."
+                )
+            budget_stats.record(self.name, result.status)
+            return result
+        finally:
+            if qid is not None:
+                PL_cut_query(qid)
+            PL_discard_foreign_frame(fid)
+            Prolog._queryIsOpen = False
+
+    def _read_bounded(self, qid, rows_ref) -> QueryResult:
+        """Rows and Status of one '$medsafe_bounded'/7 call."""
+        result = QueryResult()
+        if not PL_next_solution(qid):
+            return result
+        with PL_STRINGS_MARK():
+            result.status = to_python(rows_ref + 1)
+            tail = PL_copy_term_ref(rows_ref)
+            head = PL_new_term_ref()
+            arg = PL_new_term_ref()
+            while PL_get_list(tail, head, tail):
+                row = {}
+                for i, var in enumerate(self.outputs):
+                    PL_get_arg(i + 1, head, arg)
+                    row[var] = to_python(arg)
+                result.append(row)
+        return result
+
+    def first(self, *args, default=None, **budget):
+        rows = self.run(*args, maxresult=1, **budget)
+        return rows[0] if rows else default
+
+    def exists(self, *args, **budget) -> bool:
+        """
+        True if the goal has a solution. Note that a query cut short by
+        its budget also reads False here; use run() when the difference
+        matters.
+        """
+        return bool(self.run(*args, maxresult=1, **budget))
+
+
+# ----------------------------
+# APP QUERIES
+# ----------------------------
+# (name, goal, inputs, outputs) for every query app.py issues.
+APP_QUERIES = [
+    ('drugs', "drug(ID, Name)", (), ('ID', 'Name')),
+    ('unsafe_for_condition', "unsafe_for_condition(Drug, Cond)", ('Drug', 'Cond'), ()),
+    ('pair_severity', "unsafe_context(Drug, drug(Other), Severity)",
+     ('Drug', 'Other'), ('Severity',)),
+    ('pair_reason', "explain_unsafe(Drug, drug(Other), Reason)",
+     ('Drug', 'Other'), ('Reason',)),
+    ('foods', "unsafe_with_food(Drug, Food)", ('Drug',), ('Food',)),
+    ('food_reason', "explain_unsafe(Drug, food(Food), Reason)",
+     ('Drug', 'Food'), ('Reason',)),
+]
+
+
+# (time_limit, inference_limit) overrides; the drug index is read once
+# at startup and must be complete.
+APP_QUERY_BUDGETS = {
+    'drugs': (0, 0),
+}
+
+
+def prepare_app_queries(prolog: Prolog) -> dict:
+    """{name: PreparedQuery} for APP_QUERIES, compiled against `prolog`."""
+    install_budget_helpers(prolog)
+    return {
+        name: PreparedQuery(prolog, name, goal, inputs, outputs,
+                            *APP_QUERY_BUDGETS.get(name, (None, None)))
+        for name, goal, inputs, outputs in APP_QUERIES
+    }
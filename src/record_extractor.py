@@ -0,0 +1,288 @@
+import argparse
+import html
+import re
+import time
+from pathlib import Path
+
+# --- Configuration ---
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+INPUT_FILE_PATH = PROJECT_ROOT / 'data' / 'full database.xml'
+OUTPUT_FILE_PATH = PROJECT_ROOT / 'data' / 'target_medicines.xml'
+
+CHUNK_SIZE = 8 * 1024 * 1024
+
+DRUGBANK_HEADER = (
+    b'<?xml version="1.0" encoding="UTF-8"?>\n'
+    b'<drugbank xmlns="http://www.drugbank.ca" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://www.drugbank.ca http://www.drugbank.ca/docs/drugbank.xsd" version="5.1" exported-on="2025-01-02">\n'
+)
+
+# ----------------------------
+# RAW BYTE PATTERNS
+# ----------------------------
+# Records are located and filtered on the raw bytes of the export, so
+# records that do not match are never turned into element trees.
+#
+# <drug ...> also appears nested (pathways/pathway/drugs/drug), hence the
+# depth tracking; <drug-interactions>, <drugbank-id>, <drugs> do not match.
+DRUG_TAG_RE = re.compile(rb'<(/?)drug(?=[\s>])')
+
+# Own IDs come before <name>; later <drugbank-id> tags belong to
+# interactions, pathways, etc.
+OWN_ID_RE = re.compile(rb'<drugbank-id(?:\s[^>]*)?>\s*([^<\s]+)\s*</drugbank-id>')
+NAME_TAG = b'<name>'
+
+CATEGORIES_RE = re.compile(rb'<categories>(.*?)</categories>', re.S)
+CATEGORY_RE = re.compile(rb'<category>([^<]*)</category>')
+
+INTERACTIONS_RE = re.compile(rb'<drug-interactions>(.*?)</drug-interactions>', re.S)
+PARTNER_ID_RE = re.compile(rb'<drugbank-id>\s*([^<\s]+)\s*</drugbank-id>')
+
+# Same test as the original collector: a record with none of these
+# sections is a "skeleton" record and is skipped.
+DATA_SECTION_RE = re.compile(
+    rb'<(?:drug-interactions|mechanism-of-action|food-interactions)[\s/>]'
+)
+
+
+# ----------------------------
+# HELPERS
+# ----------------------------
+def iter_raw_records(path, chunk_size: int = CHUNK_SIZE):
+    """
+    Yield the raw bytes of each top-level <drug> record in a DrugBank
+    export, reading the file in fixed-size chunks.
+    """
+    buf = b''
+    pos = 0
+    depth = 0
+    start = None
+
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            buf += chunk
+
+            for m in DRUG_TAG_RE.finditer(buf, pos):
+                if m.group(1):
+                    depth -= 1
+                    if depth == 0 and start is not None:
+                        end = buf.find(b'>', m.end())
+                        if end < 0:
+                            # closing tag split across chunks; rescan it
+                            depth += 1
+                            pos = m.start()
+                            break
+                        yield buf[start:end + 1]
+                        start = None
+                        pos = end + 1
+                        continue
+                else:
+                    if depth == 0:
+                        start = m.start()
+                    depth += 1
+                pos = m.end()
+            else:
+                # a tag may be cut at the chunk boundary
+                pos = max(pos, len(buf) - len(b'</drug>'))
+
+            # drop everything before the open record (or the scan point)
+            cut = start if start is not None else pos
+            buf = buf[cut:]
+            pos -= cut
+            if start is not None:
+                start = 0
+
+
+def record_ids(record: bytes) -> list:
+    """All <drugbank-id> values of the record itself (primary first)."""
+    head_end = record.find(NAME_TAG)
+    head = record if head_end < 0 else record[:head_end]
+    return [i.decode('ascii', 'replace') for i in OWN_ID_RE.findall(head)]
+
+
+def record_categories(record: bytes) -> set:
+    m = CATEGORIES_RE.search(record)
+    if not m:
+        return set()
+    return {
+        html.unescape(c.decode('utf-8')).strip().lower()
+        for c in CATEGORY_RE.findall(m.group(1))
+    }
+
+
+def record_partners(record: bytes) -> list:
+    m = INTERACTIONS_RE.search(record)
+    if not m:
+        return []
+    return [i.decode('ascii', 'replace') for i in PARTNER_ID_RE.findall(m.group(1))]
+
+
+def has_data(record: bytes) -> bool:
+    return DATA_SECTION_RE.search(record) is not None
+
+
+def neighbourhood(path, seeds, hops: int) -> set:
+    """
+    IDs within `hops` interaction edges of the seed set.
+    Needs one extra pass over the file to collect the interaction graph.
+    """
+    adjacency = {}
+    for record in iter_raw_records(path):
+        ids = record_ids(record)
+        if not ids:
+            continue
+        partners = record_partners(record)
+        node = adjacency.setdefault(ids[0], set())
+        node.update(partners)
+        for p in partners:
+            adjacency.setdefault(p, set()).add(ids[0])
+        # secondary IDs resolve to the primary record
+        for alias in ids[1:]:
+            adjacency.setdefault(alias, set()).add(ids[0])
+
+    selected = set(seeds)
+    frontier = set(seeds)
+    for _ in range(hops):
+        nxt = set()
+        for drug_id in frontier:
+            nxt.update(adjacency.get(drug_id, ()))
+        frontier = nxt - selected
+        selected |= frontier
+        if not frontier:
+            break
+    return selected
+
+
+# ----------------------------
+# MAIN LOGIC
+# ----------------------------
+def extract_records(input_path=INPUT_FILE_PATH, output_path=OUTPUT_FILE_PATH,
+                    ids=None, categories=None, neighbours_of=None, hops: int = 1,
+                    verbose: bool = True) -> dict:
+    """
+    Copy matching <drug> records from a DrugBank export into a new file.
+
+    Records are selected by any of:
+      - ids:            DrugBank IDs (primary or secondary)
+      - categories:     category names (case-insensitive)
+      - neighbours_of:  seed IDs, expanded `hops` interaction edges
+    Matching records are written byte-for-byte; skeleton records
+    (no interactions, mechanism or food section) are skipped.
+    """
+    input_path = Path(input_path)
+    if not input_path.exists():
+        raise FileNotFoundError(input_path)
+
+    wanted_ids = set(ids or ())
+    wanted_categories = {c.strip().lower() for c in (categories or ())}
+
+    if neighbours_of:
+        expanded = neighbourhood(input_path, neighbours_of, hops)
+        if verbose:
+            print(f"Neighbourhood of {len(set(neighbours_of))} seed(s) "
+                  f"at {hops} hop(s): {len(expanded)} drugs")
+        wanted_ids |= expanded
+
+    if not wanted_ids and not wanted_categories:
+        raise ValueError("Nothing to select: give ids, categories or neighbours_of")
+
+    if verbose:
+        print(f"Reading from: {input_path}")
+        print(f"Writing to:   {output_path}")
+
+    scanned = 0
+    written = 0
+    skeletons = 0
+    collected_ids = set()
+    t0 = time.perf_counter()
+
+    with open(output_path, 'wb') as f:
+        f.write(DRUGBANK_HEADER)
+
+        for record in iter_raw_records(input_path):
+            scanned += 1
+
+            own_ids = record_ids(record)
+            match_id = next((i for i in own_ids if i in wanted_ids), None)
+            if match_id is None and wanted_categories and own_ids:
+                if record_categories(record) & wanted_categories:
+                    match_id = own_ids[0]
+
+            if match_id is None or match_id in collected_ids:
+                continue
+
+            if not has_data(record):
+                skeletons += 1
+                if verbose:
+                    print(f"⚠️  Skipping skeleton record for {match_id}")
+                continue
+
+            if verbose:
+                print(f"✅ Extracting: {match_id}")
+            f.write(record)
+            f.write(b'\n')
+            collected_ids.add(match_id)
+            written += 1
+
+        f.write(b'</drugbank>')
+
+    elapsed = time.perf_counter() - t0
+    rate = scanned / elapsed if elapsed > 0 else float('inf')
+    mb_rate = input_path.stat().st_size / 1e6 / elapsed if elapsed > 0 else float('inf')
+
+    print(f"\nSuccess! Extracted {written} full drug records to '{output_path}'.")
+    print(f"Scanned {scanned} records in {elapsed:.2f}s "
+          f"({rate:,.0f} records/s, {mb_rate:,.1f} MB/s); "
+          f"{skeletons} skeleton record(s) skipped.")
+
+    return {
+        'scanned': scanned,
+        'written': written,
+        'skeletons': skeletons,
+        'seconds': elapsed,
+        'records_per_second': rate,
+    }
+
+
+# ----------------------------
+# ENTRY POINT
+# ----------------------------
+def main():
+    parser = argparse.ArgumentParser(
+        description="Extract a subset of <drug> records from a DrugBank XML export."
+    )
+    parser.add_argument('--input', default=INPUT_FILE_PATH, type=Path)
+    parser.add_argument('--output', default=OUTPUT_FILE_PATH, type=Path)
+    parser.add_argument('--ids', nargs='*', default=[],
+                        help="DrugBank IDs to extract")
+    parser.add_argument('--ids-file', type=Path,
+                        help="file with one DrugBank ID per line")
+    parser.add_argument('--category', nargs='*', default=[],
+                        help="category names to extract, e.g. Anticoagulants")
+    parser.add_argument('--neighbours-of', nargs='*', default=[],
+                        help="seed IDs whose interaction neighbourhood is extracted")
+    parser.add_argument('--hops', type=int, default=1)
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args()
+
+    ids = set(args.ids)
+    if args.ids_file:
+        with open(args.ids_file, 'r', encoding='utf-8') as f:
+            ids.update(line.split('#')[0].strip() for line in f)
+        ids.discard('')
+
+    extract_records(
+        args.input, args.output,
+        ids=ids,
+        categories=args.category,
+        neighbours_of=args.neighbours_of,
+        hops=args.hops,
+        verbose=not args.quiet,
+    )
+
+
+if __name__ == '__main__':
+    main()
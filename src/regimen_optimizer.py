@@ -0,0 +1,308 @@
+import argparse
+import heapq
+import random
+import time
+from pathlib import Path
+
+from kb_encoding import SEVERITY_WEIGHTS, severity_weight
+from kb_store import OUTPUT_DB, KBStore, normalize_drug
+
+# ----------------------------
+# CONFIG
+# ----------------------------
+OBJECTIVES = ('total', 'max')
+
+
+# ----------------------------
+# SEARCH CORE
+# ----------------------------
+def _bits(mask: int):
+    """Indices of the set bits of `mask`."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def search(slots, pair_weight: dict, base_weight: dict = None, top_k: int = 5,
+           objective: str = 'total', max_weight: int = None) -> list:
+    """
+    Branch-and-bound search for the `top_k` least-risky picks of one
+    drug per slot.
+
+    slots:        list of candidate lists (drug IDs), one list per slot
+    pair_weight:  {(drug_a, drug_b): weight} for conflicting pairs
+                  (either order)
+    base_weight:  {drug: [weights]} of conflicts with fixed drugs
+                  (current medications)
+    objective:    'total' ranks by (sum, max) of weights,
+                  'max' ranks by (max, sum)
+    max_weight:   pairs heavier than this are forbidden outright
+
+    Returns [(key, [drug per slot in input order]), ...] best first.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective: {objective}")
+    base_weight = base_weight or {}
+
+    # Global bit index per distinct drug, and a conflict bitset per drug,
+    # so "does this candidate clash with anything chosen so far" is a
+    # single AND against the chosen mask.
+    index = {}
+    for candidates in slots:
+        for d in candidates:
+            index.setdefault(d, len(index))
+    drugs = list(index)
+
+    conflict_bits = [0] * len(drugs)
+    weights = {}
+    forbidden = [0] * len(drugs)
+    for (a, b), w in pair_weight.items():
+        if a not in index or b not in index or a == b:
+            continue
+        i, j = index[a], index[b]
+        weights[(i, j)] = weights[(j, i)] = max(w, weights.get((i, j), 0))
+        conflict_bits[i] |= 1 << j
+        conflict_bits[j] |= 1 << i
+        if max_weight is not None and w > max_weight:
+            forbidden[i] |= 1 << j
+            forbidden[j] |= 1 << i
+
+    base_total = [0] * len(drugs)
+    base_max = [0] * len(drugs)
+    excluded = 0
+    for d, ws in base_weight.items():
+        if d not in index or not ws:
+            continue
+        i = index[d]
+        base_total[i] = sum(ws)
+        base_max[i] = max(ws)
+        if max_weight is not None and base_max[i] > max_weight:
+            excluded |= 1 << i
+
+    # Search the most constrained slots first; inside a slot try the
+    # cheapest candidates first so good solutions tighten the bound early.
+    order = sorted(range(len(slots)), key=lambda s: len(slots[s]))
+    levels = []
+    for s in order:
+        cands = sorted(
+            (index[d] for d in dict.fromkeys(slots[s]) if not excluded >> index[d] & 1),
+            key=lambda i: (base_total[i], base_max[i], drugs[i])
+        )
+        if not cands:
+            return []
+        levels.append(cands)
+
+    # Admissible per-level lower bounds (ignore not-yet-known pair costs).
+    lb_total = [min(base_total[i] for i in c) for c in levels]
+    lb_max = [min(base_max[i] for i in c) for c in levels]
+    rest_total = [0] * (len(levels) + 1)
+    rest_max = [0] * (len(levels) + 1)
+    for depth in range(len(levels) - 1, -1, -1):
+        rest_total[depth] = rest_total[depth + 1] + lb_total[depth]
+        rest_max[depth] = max(rest_max[depth + 1], lb_max[depth])
+
+    def make_key(total, peak):
+        return (total, peak) if objective == 'total' else (peak, total)
+
+    best = []           # max-heap via negated keys: (-k0, -k1, seq, picks)
+    seq = 0
+    chosen = [0] * len(levels)
+
+    def worst_key():
+        return (-best[0][0], -best[0][1])
+
+    def descend(depth, mask, total, peak):
+        nonlocal seq
+        if depth == len(levels):
+            key = make_key(total, peak)
+            entry = (-key[0], -key[1], seq, tuple(chosen))
+            seq += 1
+            if len(best) < top_k:
+                heapq.heappush(best, entry)
+            elif key < worst_key():
+                heapq.heapreplace(best, entry)
+            return
+
+        for i in levels[depth]:
+            bit = 1 << i
+            if mask & bit or forbidden[i] & mask:
+                continue
+
+            t = total + base_total[i]
+            p = max(peak, base_max[i])
+            for j in _bits(conflict_bits[i] & mask):
+                w = weights[(i, j)]
+                t += w
+                if w > p:
+                    p = w
+
+            if len(best) == top_k:
+                bound = make_key(t + rest_total[depth + 1],
+                                 max(p, rest_max[depth + 1]))
+                if bound >= worst_key():
+                    # candidates are sorted by base cost, but pair costs
+                    # vary per branch, so keep scanning this level
+                    continue
+
+            chosen[depth] = i
+            descend(depth + 1, mask | bit, t, p)
+
+    descend(0, 0, 0, 0)
+
+    results = []
+    for neg0, neg1, _, picks in sorted(best, key=lambda e: (-e[0], -e[1], e[2])):
+        by_slot = [None] * len(slots)
+        for depth, i in enumerate(picks):
+            by_slot[order[depth]] = drugs[i]
+        results.append(((-neg0, -neg1), by_slot))
+    return results
+
+
+# ----------------------------
+# KB-BACKED OPTIMIZER
+# ----------------------------
+def optimize_regimen(store: KBStore, slots, conditions=(), current_meds=(),
+                     top_k: int = 5, objective: str = 'total',
+                     max_severity: str = None) -> list:
+    """
+    Pick one drug per therapeutic slot, avoiding interactions with each
+    other and with current medications, and skipping drugs contraindicated
+    for any of the patient's conditions.
+
+    slots: class atoms from drug_class/2 (e.g. 'anticoagulants') or
+           explicit lists of DrugBank IDs.
+    max_severity: e.g. 'moderate' forbids any 'major' interaction.
+
+    Returns a list of dicts, best first:
+      {'drugs': [...], 'total': int, 'max': int,
+       'conflicts': [(drug_a, drug_b, effect, severity), ...]}
+    """
+    conditions = set(conditions)
+    current = [normalize_drug(m) for m in current_meds]
+    current_set = set(current)
+
+    slot_candidates = []
+    for slot in slots:
+        ids = store.drugs_in_class(slot) if isinstance(slot, str) else slot
+        slot_candidates.append([
+            d for d in (normalize_drug(x) for x in ids)
+            if d not in current_set
+            and not conditions.intersection(store.conditions_for(d))
+        ])
+
+    all_ids = {d for c in slot_candidates for d in c} | current_set
+    pair_weight = {}
+    base_weight = {}
+    effects = {}
+    for a, b, effect, severity in store.interactions_among(all_ids):
+        w = severity_weight(severity)
+        effects.setdefault((a, b), []).append((effect, severity))
+        if a in current_set or b in current_set:
+            other = b if a in current_set else a
+            if other not in current_set:
+                base_weight.setdefault(other, []).append(w)
+            continue
+        key = (a, b)
+        pair_weight[key] = max(w, pair_weight.get(key, 0))
+
+    limit = SEVERITY_WEIGHTS[max_severity] if max_severity else None
+    found = search(slot_candidates, pair_weight, base_weight,
+                   top_k=top_k, objective=objective, max_weight=limit)
+
+    results = []
+    for key, picks in found:
+        members = set(picks) | current_set
+        conflicts = [
+            (a, b, effect, severity)
+            for (a, b), rows in sorted(effects.items())
+            if a in members and b in members and (a in picks or b in picks)
+            for effect, severity in rows
+        ]
+        total, peak = key if objective == 'total' else key[::-1]
+        results.append({
+            'drugs': picks,
+            'total': total,
+            'max': peak,
+            'conflicts': conflicts,
+        })
+    return results
+
+
+# ----------------------------
+# BENCHMARK
+# ----------------------------
+def random_instance(n_slots: int, n_candidates: int, density: float, seed: int = 0):
+    """Synthetic slots/conflicts for timing the search on its own."""
+    rng = random.Random(seed)
+    slots = [[f'S{s}C{c}' for c in range(n_candidates)] for s in range(n_slots)]
+    flat = [d for c in slots for d in c]
+    pair_weight = {}
+    n_pairs = int(density * len(flat) * (len(flat) - 1) / 2)
+    for _ in range(n_pairs):
+        a, b = rng.sample(flat, 2)
+        pair_weight[(a, b)] = rng.choice((1, 2, 3))
+    return slots, pair_weight
+
+
+def bench(n_slots: int = 6, n_candidates: int = 300, density: float = 0.05,
+          top_k: int = 10):
+    slots, pair_weight = random_instance(n_slots, n_candidates, density)
+    for objective in OBJECTIVES:
+        t0 = time.perf_counter()
+        found = search(slots, pair_weight, top_k=top_k, objective=objective)
+        elapsed = time.perf_counter() - t0
+        print(f"{n_slots} slots x {n_candidates} candidates, density {density}, "
+              f"objective={objective}: {len(found)} results in {elapsed:.3f}s "
+              f"(best key {found[0][0] if found else None})")
+
+
+# ----------------------------
+# ENTRY POINT
+# ----------------------------
+def main():
+    parser = argparse.ArgumentParser(
+        description="Find the least-risky combination of one drug per class."
+    )
+    parser.add_argument('slots', nargs='*',
+                        help="drug_class/2 atoms, one per slot (e.g. anticoagulants)")
+    parser.add_argument('--conditions', nargs='*', default=[])
+    parser.add_argument('--meds', nargs='*', default=[],
+                        help="current medications (DrugBank IDs)")
+    parser.add_argument('--top', type=int, default=5)
+    parser.add_argument('--objective', choices=OBJECTIVES, default='total')
+    parser.add_argument('--max-severity', choices=list(SEVERITY_WEIGHTS))
+    parser.add_argument('--db', type=Path, default=OUTPUT_DB)
+    parser.add_argument('--bench', action='store_true',
+                        help="time the search on synthetic 4-6 slot instances")
+    args = parser.parse_args()
+
+    if args.bench:
+        for n_slots in (4, 5, 6):
+            bench(n_slots=n_slots)
+        return
+
+    store = KBStore(args.db)
+    names = dict(store.drugs())
+    results = optimize_regimen(
+        store, args.slots,
+        conditions=args.conditions,
+        current_meds=args.meds,
+        top_k=args.top,
+        objective=args.objective,
+        max_severity=args.max_severity,
+    )
+
+    if not results:
+        print("No admissible combination found.")
+        return
+
+    for rank, r in enumerate(results, 1):
+        picks = ', '.join(f"{names.get(d, d)} ({d})" for d in r['drugs'])
+        print(f"{rank}. {picks} — total risk {r['total']}, max {r['max']}")
+        for a, b, effect, severity in r['conflicts']:
+            print(f"     {a} + {b}: {effect} ({severity or 'unmapped'})")
+
+
+if __name__ == '__main__':
+    main()
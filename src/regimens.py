@@ -0,0 +1,145 @@
+import csv
+from array import array
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+# ----------------------------
+# FILE FORMAT
+# ----------------------------
+# One patient per line; lists are ';'-separated like logs/sessions.csv:
+#
+#   patient_id,drugs,conditions
+#   P000001,DB00682;DB00945,hypertension;diabetes
+#   P000002,DB01050,
+#
+# The conditions column is optional.
+LIST_SEP = ';'
+
+
+def _binary_csr(rows, cols, shape) -> sparse.csr_matrix:
+    data = np.ones(len(rows), dtype=np.int32)
+    m = sparse.csr_matrix(
+        (data, (np.frombuffer(rows, dtype=np.int32), np.frombuffer(cols, dtype=np.int32))),
+        shape=shape,
+    )
+    m.sum_duplicates()
+    m.data[:] = 1           # a drug listed twice is still one exposure
+    return m
+
+
+def read_regimens(path, drug_index: dict = None, condition_index: dict = None) -> dict:
+    """
+    Load a regimen file into sparse patient x drug and patient x condition
+    matrices (0/1 entries).
+
+    drug_index / condition_index ({id: column}) fix the column order, e.g.
+    to line up with KB arrays; unknown IDs are then ignored. When omitted,
+    columns are assigned in order of first appearance.
+
+    Returns {'patients', 'drug_ids', 'X', 'condition_ids', 'P', 'unknown_drugs'}.
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Regimen file not found: {path}")
+
+    fixed_drugs = drug_index is not None
+    fixed_conds = condition_index is not None
+    drug_index = dict(drug_index or {})
+    condition_index = dict(condition_index or {})
+
+    patients = []
+    d_rows, d_cols = array('i'), array('i')
+    c_rows, c_cols = array('i'), array('i')
+    unknown = 0
+
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            raise ValueError(f"Empty regimen file: {path}")
+        if header[0].strip().lower() != 'patient_id':
+            # no header line: treat the first line as data
+            reader = _chain(header, reader)
+
+        for row in reader:
+            if not row or not row[0]:
+                continue
+            r = len(patients)
+            patients.append(row[0])
+
+            for drug_id in (row[1] if len(row) > 1 else '').split(LIST_SEP):
+                drug_id = drug_id.strip().upper()
+                if not drug_id:
+                    continue
+                col = drug_index.get(drug_id)
+                if col is None:
+                    if fixed_drugs:
+                        unknown += 1
+                        continue
+                    col = drug_index[drug_id] = len(drug_index)
+                d_rows.append(r)
+                d_cols.append(col)
+
+            for cond in (row[2] if len(row) > 2 else '').split(LIST_SEP):
+                cond = cond.strip()
+                if not cond:
+                    continue
+                col = condition_index.get(cond)
+                if col is None:
+                    if fixed_conds:
+                        continue
+                    col = condition_index[cond] = len(condition_index)
+                c_rows.append(r)
+                c_cols.append(col)
+
+    drug_ids = sorted(drug_index, key=drug_index.get)
+    condition_ids = sorted(condition_index, key=condition_index.get)
+    return {
+        'patients': patients,
+        'drug_ids': drug_ids,
+        'X': _binary_csr(d_rows, d_cols, (len(patients), len(drug_ids))),
+        'condition_ids': condition_ids,
+        'P': _binary_csr(c_rows, c_cols, (len(patients), len(condition_ids))),
+        'unknown_drugs': unknown,
+    }
+
+
+def _chain(first, rest):
+    yield first
+    yield from rest
+
+
+# ----------------------------
+# SYNTHETIC COHORTS
+# ----------------------------
+def synthetic_regimens(n_patients: int, n_drugs: int, mean_drugs: float = 5.0,
+                       n_conditions: int = 0, mean_conditions: float = 1.0,
+                       seed: int = 0) -> dict:
+    """
+    Random cohort for benchmarks: Poisson-sized regimens drawn from a
+    Zipf-like drug popularity, so a few drugs dominate as in real data.
+    Returns the same matrices as read_regimens() (X, P) without IDs.
+    """
+    rng = np.random.default_rng(seed)
+
+    def draw(n_cols, mean):
+        sizes = rng.poisson(mean, n_patients)
+        rows = np.repeat(np.arange(n_patients, dtype=np.int32), sizes)
+        popularity = 1.0 / np.arange(1, n_cols + 1)
+        popularity /= popularity.sum()
+        cols = rng.choice(n_cols, size=len(rows), p=popularity).astype(np.int32)
+        m = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+            shape=(n_patients, n_cols),
+        )
+        m.sum_duplicates()
+        m.data[:] = 1
+        return m
+
+    return {
+        'X': draw(n_drugs, mean_drugs),
+        'P': draw(n_conditions, mean_conditions) if n_conditions else
+             sparse.csr_matrix((n_patients, 0), dtype=np.int32),
+    }
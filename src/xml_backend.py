@@ -0,0 +1,106 @@
+import os
+import xml.etree.ElementTree as StdET
+
+try:
+    from lxml import etree as LxmlET
+except ImportError:          # optional dependency
+    LxmlET = None
+
+# ----------------------------
+# CONFIG
+# ----------------------------
+NS_URL = 'http://www.drugbank.ca'
+NS = {'db': NS_URL}
+DRUG_TAG = f'{{{NS_URL}}}drug'
+
+# 'auto' picks lxml when it is installed, otherwise the stdlib parser.
+# Override with MEDSAFE_XML_BACKEND=lxml|stdlib or set_backend().
+BACKEND = os.environ.get('MEDSAFE_XML_BACKEND', 'auto')
+
+
+# ----------------------------
+# BACKEND SELECTION
+# ----------------------------
+def available_backends() -> list:
+    return (['lxml'] if LxmlET is not None else []) + ['stdlib']
+
+
+def resolve_backend(name: str = None) -> str:
+    name = (name or BACKEND or 'auto').lower()
+    if name == 'auto':
+        return 'lxml' if LxmlET is not None else 'stdlib'
+    if name not in ('lxml', 'stdlib'):
+        raise ValueError(f"Unknown XML backend: {name}")
+    if name == 'lxml' and LxmlET is None:
+        raise ImportError("lxml backend requested but lxml is not installed")
+    return name
+
+
+def set_backend(name: str):
+    global BACKEND
+    BACKEND = resolve_backend(name)
+
+
+# ----------------------------
+# STREAMING DRUG ITERATOR
+# ----------------------------
+def iter_drugs(path, backend: str = None):
+    """
+    Yield each top-level <drug> element of a DrugBank XML file.
+
+    Equivalent to ET.parse(path).getroot().findall('db:drug', NS), but
+    streamed: each record is released once the caller moves on, so
+    memory stays flat on the full export. Nested <drug> elements
+    (e.g. inside pathways) are never yielded on their own.
+    """
+    if resolve_backend(backend) == 'lxml':
+        return _iter_drugs_lxml(path)
+    return _iter_drugs_stdlib(path)
+
+
+def _iter_drugs_lxml(path):
+    # tag= filtering happens inside libxml2; only <drug> end events
+    # cross into Python.
+    context = LxmlET.iterparse(
+        str(path), events=('end',), tag=DRUG_TAG, huge_tree=True
+    )
+    for _, elem in context:
+        parent = elem.getparent()
+        if parent is None or parent.getparent() is not None:
+            continue        # nested pathway drug; released with its record
+        yield elem
+        elem.clear(keep_tail=True)
+        while elem.getprevious() is not None:
+            del parent[0]
+    del context
+
+
+def _iter_drugs_stdlib(path):
+    context = StdET.iterparse(str(path), events=('start', 'end'))
+    root = None
+    depth = 0
+    for event, elem in context:
+        if event == 'start':
+            if root is None:
+                root = elem
+            depth += 1
+            continue
+        depth -= 1
+        if depth == 1 and elem.tag == DRUG_TAG:
+            yield elem
+            root.clear()
+
+
+# ----------------------------
+# HELPERS
+# ----------------------------
+def to_stdlib(elem):
+    """
+    Return `elem` as an xml.etree element, e.g. to append it to a tree
+    built with the stdlib. lxml elements are copied via serialization.
+    """
+    if isinstance(elem, StdET.Element):
+        return elem
+    copy = StdET.fromstring(LxmlET.tostring(elem, with_tail=False))
+    copy.tail = elem.tail
+    return copy
@@ -0,0 +1,77 @@
+from pathlib import Path
+
+from xml_backend import iter_drugs
+
+# ----------------------------
+# PATH SETUP
+# ----------------------------
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+INPUT_XML = PROJECT_ROOT / 'data' / 'target_medicines.xml'
+OUTPUT_PL = PROJECT_ROOT / 'kb' / 'drug_aliases.pl'
+
+NS = {'db': 'http://www.drugbank.ca'}
+
+# (kind, element path under <drug>) -- kind is the third drug_alias/3 argument
+ALIAS_SOURCES = [
+    ('name', 'db:name'),
+    ('synonym', 'db:synonyms/db:synonym'),
+    ('product', 'db:products/db:product/db:name'),
+    ('brand', 'db:international-brands/db:international-brand/db:name'),
+]
+
+
+# ----------------------------
+# HELPERS
+# ----------------------------
+def quote_atom(text: str) -> str:
+    """Alias text as a quoted Prolog atom (spaces and case preserved)."""
+    text = ' '.join(text.replace('\\', ' ').split())
+    return "'" + text.replace("'", "''") + "'"
+
+
+# ----------------------------
+# MAIN LOGIC
+# ----------------------------
+def xml_to_aliases_pl():
+    """
+    drug_alias(ID, 'Text', Kind) for every name a drug is known by:
+    its DrugBank name, synonyms, product names and international brands.
+    Consumed by src/med_resolver.py.
+    """
+    if not INPUT_XML.exists():
+        raise FileNotFoundError(f"Input XML not found: {INPUT_XML}")
+
+    OUTPUT_PL.parent.mkdir(exist_ok=True)
+
+    count = 0
+    with open(OUTPUT_PL, 'w', encoding='utf-8') as f:
+        f.write('% Auto-generated drug names, synonyms, products and brands\n\n')
+
+        for drug in iter_drugs(INPUT_XML):
+            drug_id = drug.findtext(
+                "db:drugbank-id[@primary='true']",
+                namespaces=NS
+            )
+            if not drug_id:
+                continue
+
+            # products repeat per labeller/strength; keep one alias each
+            seen = set()
+            for kind, path in ALIAS_SOURCES:
+                for el in drug.findall(path, NS):
+                    text = (el.text or '').strip()
+                    if not text or text.lower() in seen:
+                        continue
+                    seen.add(text.lower())
+                    f.write(f"drug_alias('{drug_id}', {quote_atom(text)}, {kind}).\n")
+                    count += 1
+
+    print(f"✅ Generated {count} drug aliases in {OUTPUT_PL}")
+
+
+# ----------------------------
+# ENTRY POINT
+# ----------------------------
+if __name__ == '__main__':
+    xml_to_aliases_pl()
@@ -1,7 +1,8 @@
-import xml.etree.ElementTree as ET
 import re
 from pathlib import Path
 
+from xml_backend import iter_drugs
+
 # ----------------------------
 # PATH SETUP
 # ----------------------------
@@ -35,15 +36,12 @@ def xml_to_classes_pl():
 
     OUTPUT_PL.parent.mkdir(exist_ok=True)
 
-    tree = ET.parse(INPUT_XML)
-    root = tree.getroot()
-
     count = 0
 
     with open(OUTPUT_PL, 'w', encoding='utf-8') as f:
         f.write('% Auto-generated drug class facts from target_medicines.xml\n\n')
 
-        for drug in root.findall('db:drug', NS):
+        for drug in iter_drugs(INPUT_XML):
             drug_id = drug.findtext(
                 "db:drugbank-id[@primary='true']",
                 namespaces=NS
@@ -1,7 +1,8 @@
-import xml.etree.ElementTree as ET
 import re
 from pathlib import Path
 
+from xml_backend import iter_drugs
+
 # ----------------------------
 # PATH SETUP
 # ----------------------------
@@ -35,16 +36,13 @@ def xml_to_contraindications_pl():
 
     OUTPUT_PL.parent.mkdir(exist_ok=True)
 
-    tree = ET.parse(INPUT_XML)
-    root = tree.getroot()
-
     seen = set()
     count = 0
 
     with open(OUTPUT_PL, 'w', encoding='utf-8') as f:
         f.write('% Auto-generated contraindication facts\n\n')
 
-        for drug in root.findall('db:drug', NS):
+        for drug in iter_drugs(INPUT_XML):
             drug_id = drug.findtext(
                 "db:drugbank-id[@primary='true']",
                 namespaces=NS
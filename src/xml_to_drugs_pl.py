@@ -1,7 +1,9 @@
-import xml.etree.ElementTree as ET
 import re
 import os
 from pathlib import Path
+
+from xml_backend import iter_drugs
+
 # ----------------------------
 # CONFIG
 # ----------------------------
@@ -32,15 +34,12 @@ def xml_to_drugs_pl():
 
     os.makedirs(os.path.dirname(OUTPUT_PL), exist_ok=True)
 
-    tree = ET.parse(INPUT_XML)
-    root = tree.getroot()
-
     count = 0
 
     with open(OUTPUT_PL, 'w', encoding='utf-8') as f:
         f.write('% Auto-generated from target_medicines.xml\n\n')
 
-        for drug in root.findall('db:drug', NS):
+        for drug in iter_drugs(INPUT_XML):
             drug_id = drug.findtext(
                 "db:drugbank-id[@primary='true']", 
                 namespaces=NS
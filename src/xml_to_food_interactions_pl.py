@@ -1,7 +1,8 @@
-import xml.etree.ElementTree as ET
 import re
 from pathlib import Path
 
+from xml_backend import iter_drugs
+
 # ----------------------------
 # PATH SETUP
 # ----------------------------
@@ -58,9 +59,6 @@ def xml_to_food_interactions_pl():
 
     OUTPUT_PL.parent.mkdir(exist_ok=True)
 
-    tree = ET.parse(INPUT_XML)
-    root = tree.getroot()
-
     seen_interactions = set()
     seen_notes = set()
 
@@ -78,7 +76,7 @@ def xml_to_food_interactions_pl():
             '% Auto-generated RAW food interaction notes (DrugBank-preserved)\n\n'
         )
 
-        for drug in root.findall('db:drug', NS):
+        for drug in iter_drugs(INPUT_XML):
 
             drug_id = drug.findtext(
                 "db:drugbank-id[@primary='true']",
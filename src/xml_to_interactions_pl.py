@@ -1,7 +1,9 @@
-import xml.etree.ElementTree as ET
 import re
 from pathlib import Path
 
+from interaction_provenance import ProvenanceWriter
+from xml_backend import iter_drugs
+
 # ----------------------------
 # PATH SETUP
 # ----------------------------
@@ -10,6 +12,9 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 INPUT_XML = PROJECT_ROOT / 'data' / 'target_medicines.xml'
 OUTPUT_PL = PROJECT_ROOT / 'kb' / 'interactions.pl'
 
+# Original DrugBank sentences behind each interaction/3 fact
+OUTPUT_PROV = PROJECT_ROOT / 'kb' / 'interactions.prov'
+
 NS = {'db': 'http://www.drugbank.ca'}
 
 # ----------------------------
@@ -71,16 +76,14 @@ def xml_to_interactions_pl():
 
     OUTPUT_PL.parent.mkdir(exist_ok=True)
 
-    tree = ET.parse(INPUT_XML)
-    root = tree.getroot()
-
     seen_pairs = set()
     count = 0
 
-    with open(OUTPUT_PL, 'w', encoding='utf-8') as f:
+    with open(OUTPUT_PL, 'w', encoding='utf-8') as f, \
+         ProvenanceWriter(OUTPUT_PROV) as provenance:
         f.write('% Auto-generated drug interaction facts\n\n')
 
-        for drug in root.findall('db:drug', NS):
+        for drug in iter_drugs(INPUT_XML):
             primary_id = drug.findtext(
                 "db:drugbank-id[@primary='true']",
                 namespaces=NS
@@ -119,10 +122,12 @@ def xml_to_interactions_pl():
                 f.write(
                     f"interaction('{a}', '{b}', {effect}).\n"
                 )
+                provenance.add(a, b, description)
 
                 count += 1
 
     print(f"✅ Generated {count} unique interaction facts in {OUTPUT_PL}")
+    print(f"✅ Stored {count} interaction descriptions in {OUTPUT_PROV}")
 
 
 # ----------------------------
@@ -0,0 +1,76 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+from cache_warmup import warm_cache  # noqa: E402
+from check_cache import CheckCache  # noqa: E402
+
+
+def complete(result) -> bool:
+    return not result['incomplete']
+
+
+def test_evicts_least_recently_used():
+    cache = CheckCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1          # 'b' is now the oldest
+    cache.put('c', 3)
+
+    assert 'b' not in cache
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert len(cache) == 2
+    assert cache.stats()['hits'] == 3
+
+
+def test_check_key_ignores_order_and_duplicates():
+    assert (CheckCache.check_key('DB1', ['DB3', 'DB2', 'DB3'], ['b', 'a'])
+            == CheckCache.check_key('DB1', ['DB2', 'DB3'], ['a', 'b']))
+    assert CheckCache.pair_key('DB1', 'DB2') != CheckCache.pair_key('DB2', 'DB1')
+
+
+def test_only_complete_results_are_cached():
+    cache = CheckCache()
+    results = iter([
+        {'rows': [], 'incomplete': {'foods': 'time_limit'}},
+        {'rows': ['major'], 'incomplete': {}},
+    ])
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return next(results)
+
+    first = cache.get_or_compute('k', compute, cacheable=complete)
+    assert first['incomplete'] and 'k' not in cache
+
+    second = cache.get_or_compute('k', compute, cacheable=complete)
+    third = cache.get_or_compute('k', compute, cacheable=complete)
+    assert second == third == {'rows': ['major'], 'incomplete': {}}
+    assert len(calls) == 2
+
+
+def test_warm_cache_skips_incomplete_results():
+    cache = CheckCache()
+    plan = {
+        'combos': [('DB1', ('DB2',), ()), ('DB3', (), ('asthma',))],
+        'pairs': [('DB1', 'DB2')],
+        'combo_counts': {('DB1', ('DB2',), ()): 3, ('DB3', (), ('asthma',)): 1},
+        'pair_counts': {('DB1', 'DB2'): 3},
+    }
+
+    def compute_check(drug_id, meds, conds):
+        return {'incomplete': {'conditions': 'time_limit'} if conds else {}}
+
+    def compute_pair(drug_id, other_id):
+        return {'incomplete': {}}
+
+    report = warm_cache(cache, plan, compute_check, compute_pair,
+                        budget_s=60, cacheable=complete)
+
+    assert CheckCache.check_key('DB1', ('DB2',), ()) in cache
+    assert CheckCache.check_key('DB3', (), ('asthma',)) not in cache
+    assert CheckCache.pair_key('DB1', 'DB2') in cache
+    assert (report['combos_warmed'], report['pairs_warmed']) == (2, 1)
+    assert cache.stats()['hits'] == cache.stats()['misses'] == 0
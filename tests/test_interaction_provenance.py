@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+from interaction_provenance import ProvenanceStore, ProvenanceWriter  # noqa: E402
+
+
+def test_lookup_every_pair_across_blocks(tmp_path):
+    pairs = [
+        (f'DB{i:05d}', f'DB{j:05d}', f'DB{i:05d} may increase the effect of DB{j:05d} ({i}/{j}).')
+        for i in range(1, 30) for j in range(i + 1, 30, 3)
+    ]
+    path = tmp_path / 'interactions.prov'
+    # tiny blocks: many blocks, most lookups land outside the first one
+    with ProvenanceWriter(path, block_size=200) as writer:
+        for a, b, description in reversed(pairs):
+            writer.add(b, a, description)
+
+    store = ProvenanceStore(path)
+    try:
+        assert len(store) == len(pairs)
+        assert len(store.offsets) > 10
+        for a, b, description in pairs:
+            assert store.lookup(a, b) == description
+            assert store.lookup(b.lower(), a) == description
+    finally:
+        store.close()
+
+
+def test_missing_pairs_and_bad_ids(tmp_path):
+    path = tmp_path / 'interactions.prov'
+    with ProvenanceWriter(path) as writer:
+        writer.add('DB00682', 'DB00945', 'Bleeding risk.')
+        writer.add('DB00945', 'DB00682', 'A later duplicate.')
+
+    store = ProvenanceStore(path)
+    try:
+        assert len(store) == 1
+        assert store.lookup('DB00945', 'DB00682') == 'Bleeding risk.'
+        assert store.lookup('DB00682', 'DB01050') is None
+        assert store.lookup('DB00682', 'NOT-A-DRUGBANK-ID') is None
+        assert store.lookup('DB00682', 'DBé') is None
+    finally:
+        store.close()
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'interactions.prov'
+    path.write_bytes(b'not a provenance file at all, just some bytes')
+    with pytest.raises(ValueError):
+        ProvenanceStore(path)
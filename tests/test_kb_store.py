@@ -0,0 +1,96 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+from kb_store import KBStore, build_kb_store  # noqa: E402
+
+
+def write_kb(tmp_path: Path, facts: dict) -> dict:
+    """One .pl file per predicate; predicates not given are empty."""
+    files = {}
+    for predicate in ('drug', 'interaction', 'contraindicated', 'food_interaction',
+                      'food_note', 'drug_class', 'severity'):
+        path = tmp_path / f'{predicate}.pl'
+        path.write_text(''.join(f'{fact}\n' for fact in facts.get(predicate, [])),
+                        encoding='utf-8')
+        files[predicate] = path
+    return files
+
+
+def test_profiles_for_contraindication_without_interactions_or_foods(tmp_path):
+    files = write_kb(tmp_path, {
+        'drug': ["drug('DB1', one).", "drug('DB2', two)."],
+        'contraindicated': ["contraindicated('DB1', asthma)."],
+    })
+    build_kb_store(tmp_path / 'kb.db', files)
+
+    store = KBStore(tmp_path / 'kb.db')
+    try:
+        profile = store.profile('DB1')
+        assert profile['conditions'] == ['asthma']
+        assert profile['partners'] == 0
+        assert profile['high_risk'] is False
+        assert profile['safe'] is False
+
+        assert store.profile('DB2')['safe'] is True
+    finally:
+        store.close()
+
+
+def test_high_risk_needs_contraindication_and_food_or_interaction(tmp_path):
+    files = write_kb(tmp_path, {
+        'drug': ["drug('DB1', one).", "drug('DB2', two).", "drug('DB3', three)."],
+        'contraindicated': ["contraindicated('DB1', asthma).",
+                            "contraindicated('DB2', pregnancy)."],
+        'food_interaction': ["food_interaction('DB1', alcohol, liver_toxicity)."],
+        'interaction': ["interaction('DB2', 'DB3', bleeding_risk)."],
+    })
+    build_kb_store(tmp_path / 'kb.db', files)
+
+    store = KBStore(tmp_path / 'kb.db')
+    try:
+        profiles = store.profiles()
+        assert profiles['DB1']['high_risk'] is True
+        assert profiles['DB2']['high_risk'] is True
+        assert profiles['DB3']['high_risk'] is False
+    finally:
+        store.close()
+
+
+def test_stale_sources_after_a_fact_file_changes(tmp_path):
+    files = write_kb(tmp_path, {'drug': ["drug('DB1', one)."]})
+    build_kb_store(tmp_path / 'kb.db', files)
+
+    store = KBStore(tmp_path / 'kb.db')
+    try:
+        assert store.stale_sources(files) == []
+
+        files['contraindicated'].write_text("contraindicated('DB1', asthma).\n",
+                                            encoding='utf-8')
+        assert store.stale_sources(files) == ['contraindicated']
+
+        files['drug'].unlink()
+        assert store.stale_sources(files) == ['drug', 'contraindicated']
+    finally:
+        store.close()
+
+
+def test_safe_only_without_any_unsafe_context(tmp_path):
+    # safe_drug/1: no food, condition, drug or class context at all
+    files = write_kb(tmp_path, {
+        'drug': ["drug('DB1', one).", "drug('DB2', two).", "drug('DB3', three).",
+                 "drug('DB4', four).", "drug('DB5', five).", "drug('DB6', six)."],
+        'contraindicated': ["contraindicated('DB2', asthma)."],
+        'food_interaction': ["food_interaction('DB3', alcohol, liver_toxicity)."],
+        'interaction': ["interaction('DB4', 'DB5', unknown_effect)."],
+        'drug_class': ["drug_class('DB6', anticoagulant)."],
+    })
+    build_kb_store(tmp_path / 'kb.db', files)
+
+    store = KBStore(tmp_path / 'kb.db')
+    try:
+        safe = {d for d, p in store.profiles().items() if p['safe']}
+        assert safe == {'DB1'}
+    finally:
+        store.close()
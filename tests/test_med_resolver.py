@@ -0,0 +1,61 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+from med_resolver import MedResolver, normalize_text  # noqa: E402
+
+ALIASES = [
+    ('DB01050', 'ibuprofen', 'name'),
+    ('DB01050', 'Advil', 'brand'),
+    ('DB00682', 'warfarin', 'name'),
+    ('DB00682', 'Coumadin', 'brand'),
+    ('DB00945', 'acetylsalicylic acid', 'name'),
+    ('DB00945', 'ASA', 'synonym'),
+    ('DB00316', 'acetaminophen', 'name'),
+    ('DB00316', 'Excedrin', 'product'),
+    ('DB00945', 'Excedrin', 'product'),
+    ('DB09153', 'sodium chloride', 'name'),
+    ('DB00390', 'digoxin', 'name'),
+]
+
+
+@pytest.fixture(scope='module')
+def resolver():
+    return MedResolver(ALIASES)
+
+
+def test_normalize_text_drops_strengths_forms_and_salts():
+    assert normalize_text('Advil Liqui-Gels 200 mg') == ('advil',)
+    assert normalize_text('Warfarin Sodium 5mg tab') == ('warfarin',)
+    assert normalize_text('Sodium Chloride 0.9% injection') == ('sodium', 'chloride')
+
+
+@pytest.mark.parametrize('text, drug_id, kind, confidence', [
+    ('Advil Liqui-Gels 200 mg', 'DB01050', 'brand', 0.9),
+    ('coumadin 5mg PO daily', 'DB00682', 'brand', 0.9),
+    ('ASA 81', 'DB00945', 'synonym', 0.9),
+    ('warfarin sodium', 'DB00682', 'name', 1.0),
+    ('Sodium Chloride 0.9% injection', 'DB09153', 'name', 1.0),
+    ('take db00390 once daily', 'DB00390', 'id', 1.0),
+    # longest alias inside the entry, scaled by the tokens it covers
+    ('metoprolol warfarin', 'DB00682', 'name', 0.5),
+])
+def test_resolve_examples(resolver, text, drug_id, kind, confidence):
+    r = resolver.resolve(text)
+    assert (r['drug_id'], r['kind'], r['confidence']) == (drug_id, kind, confidence)
+
+
+def test_ambiguous_product_splits_confidence(resolver):
+    r = resolver.resolve('Excedrin')
+    assert r['drug_id'] == 'DB00316'
+    assert r['candidates'] == ('DB00316', 'DB00945')
+    assert r['confidence'] == round(0.85 / 2, 3)
+
+
+def test_unknown_entry_is_unresolved(resolver):
+    r = resolver.resolve('vitamin xyz 100 mg')
+    assert r['drug_id'] is None and r['confidence'] == 0.0
+    assert list(resolver.resolve_lines(['', '  ', 'Advil'])) == [resolver.resolve('Advil')]
@@ -0,0 +1,84 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+# pyswip raises its own error (not ImportError) when SWI-Prolog is missing
+try:
+    from pyswip import Prolog
+    from pyswip.prolog import PrologError
+    from prolog_queries import (
+        STATUS_COMPLETE,
+        STATUS_INFERENCE_LIMIT,
+        STATUS_TIME_LIMIT,
+        PreparedQuery,
+        budget_stats,
+        install_budget_helpers,
+    )
+except Exception as e:
+    pytest.skip(f"SWI-Prolog not available: {e}", allow_module_level=True)
+
+
+@pytest.fixture(scope='module')
+def prolog():
+    p = Prolog()
+    install_budget_helpers(p)
+    p.dynamic("medsafe_test_severity/3")
+    p.retractall("medsafe_test_severity(_, _, _)")
+    for fact in ("medsafe_test_severity('DB00682', 'DB00945', major)",
+                 "medsafe_test_severity('DB00682', 'DB00945', moderate)",
+                 "medsafe_test_severity('O''Brien', 'DB1', minor)"):
+        p.assertz(fact)
+    return p
+
+
+def test_complete_rows_with_atoms_bound_verbatim(prolog):
+    q = PreparedQuery(prolog, 'test_pair', "medsafe_test_severity(A, B, S)",
+                      inputs=('A', 'B'), outputs=('S',))
+
+    rows = q('DB00682', 'DB00945')
+    assert rows == [{'S': 'major'}, {'S': 'moderate'}]
+    assert rows.status == STATUS_COMPLETE and rows.complete
+
+    # quotes are data, not syntax
+    assert q("O'Brien", 'DB1') == [{'S': 'minor'}]
+    assert q("x') ; true ; ('", 'DB1') == []
+
+
+def test_maxresult_is_still_complete(prolog):
+    q = PreparedQuery(prolog, 'test_count', "between(1, 10, X)",
+                      inputs=(), outputs=('X',))
+    rows = q.run(maxresult=3)
+    assert rows == [{'X': 1}, {'X': 2}, {'X': 3}]
+    assert rows.complete
+
+
+def test_inference_limit_keeps_rows_found_so_far(prolog):
+    q = PreparedQuery(prolog, 'test_endless', "between(1, inf, X)",
+                      inputs=(), outputs=('X',), time_limit=0, inference_limit=10_000)
+    rows = q()
+    assert rows.status == STATUS_INFERENCE_LIMIT and not rows.complete
+    assert rows and rows[:2] == [{'X': 1}, {'X': 2}]
+
+
+def test_time_limit(prolog):
+    q = PreparedQuery(prolog, 'test_spin', "repeat, fail",
+                      inputs=(), outputs=(), time_limit=0.2, inference_limit=0)
+    rows = q()
+    assert rows == [] and rows.status == STATUS_TIME_LIMIT
+
+
+def test_errors_raise_and_statuses_are_counted(prolog):
+    budget_stats.reset()
+    q = PreparedQuery(prolog, 'test_error', "atom_length(X, _)",
+                      inputs=(), outputs=('X',))
+    with pytest.raises(PrologError):
+        q()
+
+    PreparedQuery(prolog, 'test_stats', "between(1, inf, X)",
+                  inputs=(), outputs=('X',), time_limit=0, inference_limit=1_000)()
+    assert budget_stats.stats()['by_query'] == {
+        'test_stats': {STATUS_INFERENCE_LIMIT: 1},
+    }
@@ -0,0 +1,75 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+from record_extractor import (  # noqa: E402
+    extract_records,
+    iter_raw_records,
+    record_categories,
+    record_ids,
+    record_partners,
+)
+
+WARFARIN = (
+    b'<drug type="small molecule">\n'
+    b'  <drugbank-id primary="true">DB00682</drugbank-id>\n'
+    b'  <drugbank-id>APRD00564</drugbank-id>\n'
+    b'  <name>Warfarin</name>\n'
+    b'  <categories><category>Anticoagulants</category></categories>\n'
+    b'  <drug-interactions>\n'
+    b'    <drug-interaction><drugbank-id>DB00945</drugbank-id>'
+    b'<name>Aspirin</name></drug-interaction>\n'
+    b'  </drug-interactions>\n'
+    b'  <pathways><pathway><drugs>\n'
+    b'    <drug><drugbank-id>DB00945</drugbank-id><name>Aspirin</name></drug>\n'
+    b'  </drugs></pathway></pathways>\n'
+    b'</drug>'
+)
+ASPIRIN = (
+    b'<drug type="small molecule">\n'
+    b'  <drugbank-id primary="true">DB00945</drugbank-id>\n'
+    b'  <name>Aspirin</name>\n'
+    b'  <mechanism-of-action>COX inhibitor</mechanism-of-action>\n'
+    b'</drug>'
+)
+SKELETON = (
+    b'<drug type="biotech">\n'
+    b'  <drugbank-id primary="true">DB00001</drugbank-id>\n'
+    b'  <name>Lepirudin</name>\n'
+    b'</drug>'
+)
+
+
+def write_export(tmp_path: Path) -> Path:
+    path = tmp_path / 'drugbank.xml'
+    path.write_bytes(
+        b'<?xml version="1.0" encoding="UTF-8"?>\n<drugbank>\n'
+        + b'\n'.join((WARFARIN, ASPIRIN, SKELETON))
+        + b'\n</drugbank>\n'
+    )
+    return path
+
+
+def test_records_survive_every_chunk_boundary(tmp_path):
+    path = write_export(tmp_path)
+    for chunk_size in range(1, path.stat().st_size + 1):
+        records = list(iter_raw_records(path, chunk_size=chunk_size))
+        assert records == [WARFARIN, ASPIRIN, SKELETON], chunk_size
+
+
+def test_record_fields_ignore_nested_drugs():
+    assert record_ids(WARFARIN) == ['DB00682', 'APRD00564']
+    assert record_categories(WARFARIN) == {'anticoagulants'}
+    assert record_partners(WARFARIN) == ['DB00945']
+
+
+def test_extract_by_secondary_id_and_category_skips_skeletons(tmp_path):
+    path = write_export(tmp_path)
+    out = tmp_path / 'subset.xml'
+
+    stats = extract_records(path, out, ids={'APRD00564', 'DB00001'},
+                            categories=['anticoagulants'], verbose=False)
+
+    assert (stats['scanned'], stats['written'], stats['skeletons']) == (3, 1, 1)
+    assert list(iter_raw_records(out)) == [WARFARIN]
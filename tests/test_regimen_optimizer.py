@@ -0,0 +1,77 @@
+import itertools
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+from regimen_optimizer import OBJECTIVES, search  # noqa: E402
+
+
+def regimen_key(picks, pair_weight, base_weight, objective, max_weight):
+    """(total, max) or (max, total) of one pick, or None if forbidden."""
+    pairs = {}
+    for (a, b), w in pair_weight.items():
+        if a != b:
+            pairs[frozenset((a, b))] = max(w, pairs.get(frozenset((a, b)), 0))
+    weights = [w for d in picks for w in base_weight.get(d, [])]
+    weights += [pairs[frozenset(p)] for p in itertools.combinations(picks, 2)
+                if frozenset(p) in pairs]
+    if max_weight is not None and any(w > max_weight for w in weights):
+        return None
+    total, peak = sum(weights), max(weights, default=0)
+    return (total, peak) if objective == 'total' else (peak, total)
+
+
+def brute_force(slots, pair_weight, base_weight, objective, max_weight):
+    keys = []
+    for picks in set(itertools.product(*slots)):
+        if len(set(picks)) < len(picks):
+            continue
+        key = regimen_key(picks, pair_weight, base_weight, objective, max_weight)
+        if key is not None:
+            keys.append(key)
+    return sorted(keys)
+
+
+def random_instance(rng):
+    pool = [f'D{i}' for i in range(rng.randint(3, 8))]
+    slots = [rng.sample(pool, rng.randint(1, min(4, len(pool))))
+             for _ in range(rng.randint(1, 4))]
+    pair_weight = {
+        (a, b): rng.choice((1, 2, 3))
+        for a, b in itertools.combinations(pool, 2) if rng.random() < 0.4
+    }
+    base_weight = {
+        d: [rng.choice((1, 2, 3)) for _ in range(rng.randint(1, 2))]
+        for d in pool if rng.random() < 0.3
+    }
+    return slots, pair_weight, base_weight
+
+
+def test_search_matches_brute_force_on_small_instances():
+    rng = random.Random(7)
+    for _ in range(300):
+        slots, pair_weight, base_weight = random_instance(rng)
+        objective = rng.choice(OBJECTIVES)
+        max_weight = rng.choice((None, 2))
+        top_k = rng.randint(1, 4)
+
+        found = search(slots, pair_weight, base_weight, top_k=top_k,
+                       objective=objective, max_weight=max_weight)
+        expected = brute_force(slots, pair_weight, base_weight, objective, max_weight)
+
+        assert [key for key, _ in found] == expected[:top_k]
+        for key, picks in found:
+            assert all(d in slot for d, slot in zip(picks, slots))
+            assert len(set(picks)) == len(picks)
+            assert regimen_key(picks, pair_weight, base_weight,
+                               objective, max_weight) == key
+
+
+def test_search_avoids_forbidden_pairs():
+    slots = [['A', 'B'], ['C']]
+    pair_weight = {('A', 'C'): 3, ('B', 'C'): 1}
+
+    assert search(slots, pair_weight, top_k=5, max_weight=2) == [((1, 1), ['B', 'C'])]
+    assert search(slots, pair_weight, top_k=5, max_weight=0) == []